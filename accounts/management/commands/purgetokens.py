@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import Token
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete login tokens older than LOGIN_TOKEN_TTL, a bounded batch per '
+        'transaction with a pause in between, so the write lock is never '
+        'held for long.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        deleted = 0
+        while True:
+            ids = list(
+                Token.objects.expired().order_by('id')
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            deleted += Token.objects.filter(id__in=ids).delete()[0]
+            time.sleep(options['pause'])
+        self.stdout.write(f'Deleted {deleted} expired tokens.')
@@ -1,5 +1,9 @@
 import uuid
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 class User(models.Model):
     email = models.EmailField(primary_key=True)
@@ -10,6 +14,26 @@ class User(models.Model):
     is_authenticated = True
 
 
+class TokenQuerySet(models.QuerySet):
+
+    def _cutoff(self):
+        return timezone.now() - timedelta(seconds=settings.LOGIN_TOKEN_TTL)
+
+    def valid(self):
+        return self.filter(created__gte=self._cutoff())
+
+    def expired(self):
+        return self.filter(created__lt=self._cutoff())
+
+
 class Token(models.Model):
     email = models.EmailField()
-    uid = models.CharField(default=uuid.uuid4, max_length=40)
\ No newline at end of file
+    uid = models.CharField(default=uuid.uuid4, max_length=40, unique=True)
+    created = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = TokenQuerySet.as_manager()
+
+    @property
+    def is_expired(self):
+        age = timezone.now() - self.created
+        return age > timedelta(seconds=settings.LOGIN_TOKEN_TTL)
@@ -0,0 +1,24 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import Token
+
+
+@override_settings(LOGIN_TOKEN_TTL=60)
+class PurgeTokensTest(TestCase):
+
+    def test_deletes_only_expired_tokens_in_batches(self):
+        long_ago = timezone.now() - timedelta(seconds=61)
+        for _ in range(5):
+            Token.objects.create(email='a@b.com', created=long_ago)
+        fresh = Token.objects.create(email='a@b.com')
+
+        out = StringIO()
+        call_command('purgetokens', batch_size=2, pause=0, stdout=out)
+
+        self.assertEqual(list(Token.objects.all()), [fresh])
+        self.assertIn('Deleted 5 expired tokens.', out.getvalue())
@@ -1,5 +1,9 @@
-from django.test import TestCase
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -21,4 +25,19 @@ class TokenModelTest(TestCase):
     def test_links_user_with_auto_generated_uid(self):
         token1 = Token.objects.create(email='a@b.com')
         token2 = Token.objects.create(email='a@b.com')
-        self.assertNotEqual(token1.uid, token2.uid)
\ No newline at end of file
+        self.assertNotEqual(token1.uid, token2.uid)
+
+    def test_uid_is_unique(self):
+        token = Token.objects.create(email='a@b.com')
+        with self.assertRaises(IntegrityError):
+            Token.objects.create(email='c@d.com', uid=token.uid)
+
+    @override_settings(LOGIN_TOKEN_TTL=60)
+    def test_expires_after_ttl(self):
+        fresh = Token.objects.create(email='a@b.com')
+        stale = Token.objects.create(
+            email='a@b.com', created=timezone.now() - timedelta(seconds=61))
+        self.assertFalse(fresh.is_expired)
+        self.assertTrue(stale.is_expired)
+        self.assertEqual(list(Token.objects.valid()), [fresh])
+        self.assertEqual(list(Token.objects.expired()), [stale])
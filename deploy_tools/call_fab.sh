@@ -9,9 +9,17 @@ MEDIA=False
 SSL=True
 STATIC=False
 CLIENT_MAX=10
+# gunicorn; leave empty to size from the server's CPU count
+WORKERS=
+THREADS=
+WORKER_CLASS=gthread
+PRELOAD=True
+MAX_REQUESTS=1000
 
 fab --set project_name=$PROJECT_NAME,default=$DEFAULT,media=$MEDIA,\
-ssl=$SSL,static=$STATIC,c_max=$CLIENT_MAX \
+ssl=$SSL,static=$STATIC,c_max=$CLIENT_MAX,\
+workers=$WORKERS,threads=$THREADS,worker_class=$WORKER_CLASS,\
+preload=$PRELOAD,max_requests=$MAX_REQUESTS \
 deploy:host=$USER@$STAGING_SITE --port $PORT
 
 # project_name = env['project_name']
@@ -20,4 +28,5 @@ deploy:host=$USER@$STAGING_SITE --port $PORT
 # ssl = env.get('ssl', False)
 # static = env.get('static', False)
 # c_max = env.get('client_max', 10)
+# workers, threads, worker_class, preload, max_requests, ... -> gunicorn.env
 
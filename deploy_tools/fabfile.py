@@ -12,6 +12,11 @@ media = env.get('media', False)
 ssl = env.get('ssl', False)
 static = env.get('static', False)
 c_max = env.get('client_max', 10)
+# Passed through to superlists/gunicorn_conf.py; unset ones use its defaults.
+GUNICORN_SETTINGS = (
+    'workers', 'threads', 'worker_class', 'preload', 'max_requests',
+    'max_requests_jitter', 'backlog', 'timeout', 'graceful_timeout', 'keepalive',
+)
 
 def deploy():
     site_folder = f'/home/{env.user}/sites/{env.host}'
@@ -42,7 +47,7 @@ def _install_necessary_packages():
     sudo(
         'add-apt-repository -y ppa:fkrull/deadsnakes'
         ' && apt-get -y update'
-        ' && apt-get install -y nginx git python3.6 python3.6-venv'
+        ' && apt-get install -y nginx git python3.6 python3.6-venv memcached'
     )
 
 def _create_directory_structure_if_necessary(site_folder):
@@ -82,20 +87,42 @@ def _update_settings(source_folder, site_name, setup_media=False):
                 run("""echo "\nMEDIA_URL = '/media/'" """
                     f'| tee -a {source_folder}/{project_name}/settings.py')
 
+def _write_gunicorn_env(site_name):
+    lines = [
+        f'GUNICORN_{name.upper()}={env[name]}'
+        for name in GUNICORN_SETTINGS if env.get(name)
+    ]
+    # list pages subscribe to the uvicorn service installed alongside
+    lines.append('DJANGO_LIVE_UPDATES=1')
+    env_file = f'/home/{env.user}/sites/{site_name}/gunicorn.env'
+    run(f'rm -f {env_file} && touch {env_file}')
+    if lines:
+        append(env_file, lines)
+
 def _install_gunicorn_systemd_service(site_name):
-    if not exists(f'/etc/systemd/system/gunicorn-{site_name}.service'):
-        put('gunicorn-systemd.template.service',
-            f'/home/{env.user}/gunicorn-{site_name}.service')
-        sed(f'/home/{env.user}/gunicorn-{site_name}.service',
-            'SITENAME', f'{site_name}')
-        sed(f'/home/{env.user}/gunicorn-{site_name}.service',
-            'USERNAME', f'{env.user}')
-        sudo(f'mv /home/{env.user}/gunicorn-{site_name}.service'
-            f' /etc/systemd/system/gunicorn-{site_name}.service')
+    _write_gunicorn_env(site_name)
+    # Always re-put the unit so changes to the template reach existing sites.
+    put('gunicorn-systemd.template.service',
+        f'/home/{env.user}/gunicorn-{site_name}.service')
+    sed(f'/home/{env.user}/gunicorn-{site_name}.service',
+        'SITENAME', f'{site_name}')
+    sed(f'/home/{env.user}/gunicorn-{site_name}.service',
+        'USERNAME', f'{env.user}')
+    sudo(f'mv /home/{env.user}/gunicorn-{site_name}.service'
+        f' /etc/systemd/system/gunicorn-{site_name}.service')
+    put('uvicorn-systemd.template.service',
+        f'/home/{env.user}/uvicorn-{site_name}.service')
+    sed(f'/home/{env.user}/uvicorn-{site_name}.service',
+        'SITENAME', f'{site_name}')
+    sed(f'/home/{env.user}/uvicorn-{site_name}.service',
+        'USERNAME', f'{env.user}')
+    sudo(f'mv /home/{env.user}/uvicorn-{site_name}.service'
+        f' /etc/systemd/system/uvicorn-{site_name}.service')
     sudo('systemctl daemon-reload')
-    sudo(f'systemctl enable gunicorn-{site_name}')
-    sudo(f'systemctl start gunicorn-{site_name}')
-    sudo(f'systemctl restart gunicorn-{site_name}')
+    for service in (f'uvicorn-{site_name}', f'gunicorn-{site_name}'):
+        sudo(f'systemctl enable {service}')
+        sudo(f'systemctl start {service}')
+        sudo(f'systemctl restart {service}')
 
 def _update_virtualenv(source_folder):
     virtualenv_folder = source_folder + '/../virtualenv'
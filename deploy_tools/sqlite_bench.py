@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Measure SQLite read and write throughput with several worker processes
+hitting one database file, once with SQLite's defaults and once with the
+SQLITE_PRAGMAS profile from superlists/settings.py.
+
+    python deploy_tools/sqlite_bench.py --readers 3 --writers 2 --seconds 5
+
+Each profile gets a fresh database file seeded with a copy of the lists_item
+shape, so the numbers are comparable between runs.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from superlists.backends.sqlite3.pragmas import apply_pragmas  # noqa: E402
+from superlists.settings import SQLITE_PRAGMAS  # noqa: E402
+
+LISTS = 200
+ITEMS_PER_LIST = 50
+
+SCHEMA = '''
+CREATE TABLE item (
+    id integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+    list_id integer NOT NULL,
+    text text NOT NULL
+);
+CREATE INDEX item_list_id_id ON item (list_id, id);
+'''
+
+
+def _connect(path, pragmas):
+    # autocommit, as Django runs its SQLite connections
+    conn = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(conn, pragmas)
+    return conn
+
+
+def _seed(path, pragmas):
+    conn = _connect(path, pragmas)
+    conn.executescript(SCHEMA)
+    conn.execute('BEGIN')
+    conn.executemany(
+        'INSERT INTO item (list_id, text) VALUES (?, ?)',
+        ((list_id, f'item {n}') for list_id in range(1, LISTS + 1)
+         for n in range(ITEMS_PER_LIST))
+    )
+    conn.execute('COMMIT')
+    conn.close()
+
+
+def _work(path, pragmas, role, seconds, seed, results):
+    conn = _connect(path, pragmas)
+    rng = random.Random(seed)
+    ops = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        list_id = rng.randint(1, LISTS)
+        try:
+            if role == 'read':
+                conn.execute(
+                    'SELECT id, text FROM item WHERE list_id = ? ORDER BY id',
+                    (list_id,)
+                ).fetchall()
+            else:
+                conn.execute(
+                    'INSERT INTO item (list_id, text) VALUES (?, ?)',
+                    (list_id, f'worker {seed} item {ops}')
+                )
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    conn.close()
+    results.put((role, ops, errors))
+
+
+def run(pragmas, readers, writers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        _seed(path, pragmas)
+        results = multiprocessing.Queue()
+        roles = ['read'] * readers + ['write'] * writers
+        workers = [
+            multiprocessing.Process(
+                target=_work,
+                args=(path, pragmas, role, seconds, seed, results)
+            )
+            for seed, role in enumerate(roles)
+        ]
+        for worker in workers:
+            worker.start()
+        totals = {'read': [0, 0], 'write': [0, 0]}
+        for _ in workers:
+            role, ops, errors = results.get()
+            totals[role][0] += ops
+            totals[role][1] += errors
+        for worker in workers:
+            worker.join()
+    return {
+        'reads_per_sec': round(totals['read'][0] / seconds),
+        'writes_per_sec': round(totals['write'][0] / seconds),
+        'errors': totals['read'][1] + totals['write'][1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--readers', type=int, default=3)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f'{args.readers} readers, {args.writers} writers, {args.seconds}s each')
+    print(f'{"profile":<10}{"reads/s":>12}{"writes/s":>12}{"errors":>10}')
+    for name, pragmas in (('default', {}), ('tuned', SQLITE_PRAGMAS)):
+        result = run(pragmas, args.readers, args.writers, args.seconds)
+        print(f'{name:<10}{result["reads_per_sec"]:>12}'
+              f'{result["writes_per_sec"]:>12}{result["errors"]:>10}')
+
+
+if __name__ == '__main__':
+    main()
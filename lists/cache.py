@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.safestring import mark_safe
+
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+HITS_KEY = 'lists:fragments:hits'
+MISSES_KEY = 'lists:fragments:misses'
+
+
+def _stats_cache():
+    # shared by every worker and by manage.py fragmentcachestats, even
+    # when the fragments themselves are cached per process
+    return caches[settings.FRAGMENT_STATS_CACHE]
+
+
+def _count(key):
+    stats_cache = _stats_cache()
+    stats_cache.add(key, 0, None)
+    try:
+        stats_cache.incr(key)
+    except ValueError:
+        # evicted between the add and the incr
+        stats_cache.set(key, 1, None)
+
+
+def stats():
+    return {
+        'hits': _stats_cache().get(HITS_KEY, 0),
+        'misses': _stats_cache().get(MISSES_KEY, 0),
+    }
+
+
+def get_or_render(key, render):
+    """Return (html, hit) for a cached fragment, rendering it on a miss.
+
+    Only the request holding the per-key lock renders a missing fragment;
+    the others poll the cache until it shows up, and only render it
+    themselves if the lock holder takes longer than LOCK_TIMEOUT.
+    """
+    html = cache.get(key)
+    if html is not None:
+        _count(HITS_KEY)
+        return mark_safe(html), True
+
+    lock_key = f'{key}:lock'
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not locked and time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        html = cache.get(key)
+        if html is not None:
+            _count(HITS_KEY)
+            return mark_safe(html), True
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+
+    _count(MISSES_KEY)
+    try:
+        html = render()
+        cache.set(key, html, FRAGMENT_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return mark_safe(html), False
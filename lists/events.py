@@ -0,0 +1,208 @@
+"""Server-sent events for new list items, served by superlists/asgi.py.
+
+Each process runs one ListEvents hub. However many browsers are watching,
+the hub makes one query per POLL_INTERVAL for the versions of the lists
+being watched, and fetches new items once per changed list, rendering each
+row once for all of that list's subscribers.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.template.loader import render_to_string
+
+from lists.models import Item, List
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1
+# A client further behind than this is told to reload the page instead.
+CATCH_UP_LIMIT = 1000
+HEARTBEAT_INTERVAL = 15
+# reconnecting browsers wait this long (ms) before trying again
+RETRY_MS = 3000
+
+
+def _new_items(list_id, after_id, limit=None):
+    """Return (item id, rendered row) for items added after after_id,
+    numbered as appended to the end of the list; None if there are more
+    than limit of them."""
+    rows = Item.objects.filter(list_id=list_id, id__gt=after_id).order_by(
+        'id').values('id', 'text')
+    rows = list(rows if limit is None else rows[:limit + 1])
+    if limit is not None and len(rows) > limit:
+        return None
+    item_count = (
+        List.objects.filter(id=list_id).values_list('item_count', flat=True)
+        .first() or 0
+    )
+    first_number = item_count - len(rows) + 1
+    return [
+        (row['id'], render_to_string(
+            'item_row.html', {'item': row, 'number': first_number + n}))
+        for n, row in enumerate(rows)
+    ]
+
+
+# queued in place of the items when a subscriber is too far behind
+RELOAD = (None, None)
+
+
+class ListEvents:
+
+    def __init__(self, interval=POLL_INTERVAL, executor=None):
+        self.interval = interval
+        # The ORM is synchronous, so queries run in this one thread (and so
+        # on one database connection) rather than blocking the event loop.
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+        self.subscribers = defaultdict(set)
+        self.state = {}  # list id -> (version, last item id seen)
+        self.poller = None
+
+    def _run(self, func, *args):
+        def call():
+            close_old_connections()
+            return func(*args)
+        return asyncio.get_event_loop().run_in_executor(self.executor, call)
+
+    @staticmethod
+    def _versions(list_ids):
+        return list(List.objects.filter(id__in=list_ids).values_list('id', 'version'))
+
+    @staticmethod
+    def _current_state(list_id):
+        version = List.objects.filter(id=list_id).values_list(
+            'version', flat=True).first()
+        last_id = Item.objects.filter(list_id=list_id).order_by('-id').values_list(
+            'id', flat=True).first()
+        return version, last_id or 0
+
+    async def subscribe(self, list_id, since):
+        """Return a queue that gets (item id, row) for every item added to
+        the list after item id since, starting with any already there."""
+        queue = asyncio.Queue()
+        if list_id not in self.state:
+            self.state[list_id] = await self._run(self._current_state, list_id)
+        self.subscribers[list_id].add(queue)
+        if self.poller is None or self.poller.done():
+            self.poller = asyncio.ensure_future(self._poll())
+        # catch up on anything the page missed; the poller takes it from here
+        if since < self.state[list_id][1]:
+            items = await self._run(_new_items, list_id, since, CATCH_UP_LIMIT)
+            for item in items if items is not None else [RELOAD]:
+                queue.put_nowait(item)
+        return queue
+
+    def unsubscribe(self, list_id, queue):
+        self.subscribers[list_id].discard(queue)
+        if not self.subscribers[list_id]:
+            del self.subscribers[list_id]
+            self.state.pop(list_id, None)
+
+    async def _poll(self):
+        while self.subscribers:
+            await asyncio.sleep(self.interval)
+            try:
+                await self._check_for_new_items()
+            except Exception:
+                logger.exception('Polling for new list items failed')
+
+    async def _check_for_new_items(self):
+        versions = dict(await self._run(self._versions, list(self.subscribers)))
+        for list_id, version in versions.items():
+            if list_id not in self.state or self.state[list_id][0] == version:
+                continue
+            last_id = self.state[list_id][1]
+            items = await self._run(_new_items, list_id, last_id)
+            if items:
+                last_id = items[-1][0]
+            self.state[list_id] = (version, last_id)
+            for queue in self.subscribers.get(list_id, ()):
+                for item in items:
+                    queue.put_nowait(item)
+
+
+def _event(item_id, row):
+    data = json.dumps({'id': item_id, 'row': row})
+    return f'id: {item_id}\nevent: item\ndata: {data}\n\n'.encode('utf-8')
+
+
+def _since(scope):
+    # a reconnecting EventSource sends the id of the last event it got
+    headers = dict(scope.get('headers', []))
+    value = headers.get(b'last-event-id', b'').decode('latin-1')
+    if not value.isdigit():
+        query = dict(
+            part.split('=', 1) for part in
+            scope.get('query_string', b'').decode('latin-1').split('&')
+            if '=' in part
+        )
+        value = query.get('since', '')
+    return int(value) if value.isdigit() else 0
+
+
+async def _disconnect(receive):
+    # uvicorn hands over the (empty) request body first
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream(hub, list_id, scope, receive, send):
+    """ASGI response streaming a list's new items until the client goes."""
+    exists = await hub._run(
+        lambda: List.objects.filter(id=list_id).exists())
+    if not exists:
+        await send({'type': 'http.response.start', 'status': 404, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': f'retry: {RETRY_MS}\n\n'.encode('ascii'),
+        'more_body': True,
+    })
+    last_sent = _since(scope)
+    queue = await hub.subscribe(list_id, last_sent)
+    disconnected = asyncio.ensure_future(_disconnect(receive))
+    try:
+        while True:
+            item = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                [item, disconnected], timeout=HEARTBEAT_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected in done:
+                item.cancel()
+                return
+            if item in done and item.result() == RELOAD:
+                await send({
+                    'type': 'http.response.body',
+                    'body': b'event: reload\ndata: \n\n',
+                })
+                return
+            if item in done:
+                item_id, row = item.result()
+                # the catch-up and the poller can both have this one
+                if item_id <= last_sent:
+                    continue
+                last_sent = item_id
+                body = _event(item_id, row)
+            else:
+                item.cancel()
+                body = b': keepalive\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    finally:
+        hub.unsubscribe(list_id, queue)
+        disconnected.cancel()
@@ -1,12 +1,16 @@
-from django.core.exceptions import ValidationError
 from django import forms
+from django.db import IntegrityError, transaction
 
-from lists.models import Item
+from lists.models import Item, List, hash_item_text
+from lists.positions import keys_after
 
 
 EMPTY_ITEM_ERROR = "You can't have an empty list item"
 DUPLICATE_ITEM_ERROR = "You've already got this in your list"
 
+# SQLite refuses statements with more than 999 parameters
+BULK_BATCH_SIZE = 500
+
 class ItemForm(forms.models.ModelForm):
 
     def save(self, for_list):
@@ -35,11 +39,66 @@ class ExistingListItemForm(ItemForm):
         self.instance.list = for_list
 
     def validate_unique(self):
-        try:
-            self.instance.validate_unique()
-        except ValidationError as e:
-            e.error_dict = {'text': [DUPLICATE_ITEM_ERROR]}
-            self._update_errors(e)
+        # duplicates are caught by the (list, text_hash) index in save(),
+        # which saves a SELECT before every INSERT
+        pass
 
     def save(self):
-        return forms.models.ModelForm.save(self)
\ No newline at end of file
+        try:
+            # Item.save rolls its own transaction back on the error
+            return forms.models.ModelForm.save(self)
+        except IntegrityError:
+            self.add_error('text', DUPLICATE_ITEM_ERROR)
+
+
+def _bulk_insert(for_list, texts):
+    hashes = {text: hash_item_text(text) for text in texts}
+    hash_values = list(hashes.values())
+    existing = set()
+    for start in range(0, len(hash_values), BULK_BATCH_SIZE):
+        existing.update(
+            for_list.item_set
+            .filter(text_hash__in=hash_values[start:start + BULK_BATCH_SIZE])
+            .values_list('text_hash', flat=True)
+        )
+    new_texts = [text for text in texts if hashes[text] not in existing]
+    positions = keys_after(for_list.last_position or None, len(new_texts))
+    new_items = [
+        Item(list=for_list, text=text, text_hash=hashes[text], position=position)
+        for text, position in zip(new_texts, positions)
+    ]
+    Item.objects.bulk_create(new_items, batch_size=BULK_BATCH_SIZE)
+    if new_items:
+        # bulk_create skips the post_save signal
+        List.touch(for_list.id, added=len(new_items), position=positions[-1])
+        for_list.last_position = positions[-1]
+    return new_items, [text for text in texts if hashes[text] in existing]
+
+
+def save_items_in_bulk(for_list, texts):
+    rejected = []
+    candidates = []
+    seen = set()
+    for text in texts:
+        cleaned = text.strip()
+        if not cleaned:
+            rejected.append({'text': text, 'error': EMPTY_ITEM_ERROR})
+        elif hash_item_text(cleaned) in seen:
+            rejected.append({'text': text, 'error': DUPLICATE_ITEM_ERROR})
+        else:
+            seen.add(hash_item_text(cleaned))
+            candidates.append(cleaned)
+
+    try:
+        with transaction.atomic():
+            created, duplicates = _bulk_insert(for_list, candidates)
+    except IntegrityError:
+        # someone else added one of our texts between the SELECT and the
+        # INSERT; their row is committed now, so a second pass sees it
+        with transaction.atomic():
+            created, duplicates = _bulk_insert(for_list, candidates)
+
+    rejected.extend(
+        {'text': text, 'error': DUPLICATE_ITEM_ERROR} for text in duplicates
+    )
+    return created, rejected
@@ -0,0 +1,44 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from lists.models import List
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the items of lists not updated for --idle-days out of '
+        'lists_item into one compressed ArchivedList row per list. A list is '
+        'put back the next time it is viewed or written to.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idle-days', type=float, default=7)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--pause', type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        idle_since = timezone.now() - datetime.timedelta(days=options['idle_days'])
+        candidates = List.objects.filter(
+            archived=False, item_count__gt=0, updated_at__lt=idle_since,
+        ).order_by('id')
+
+        last_id = 0
+        lists = items = 0
+        while True:
+            batch = list(
+                candidates.filter(id__gt=last_id)
+                .values_list('id', 'item_count')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            for list_id, item_count in batch:
+                # each list is its own short transaction
+                if List(id=list_id).archive(idle_since):
+                    lists += 1
+                    items += item_count
+            last_id = batch[-1][0]
+            time.sleep(options['pause'])
+        self.stdout.write(f'Archived {lists} lists ({items} items).')
@@ -0,0 +1,133 @@
+import json
+import platform
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from lists.forms import save_items_in_bulk
+from lists.models import List
+
+DEFAULT_SIZES = '10,1000,100000,1000000'
+SEED_CHUNK = 10000
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark home_page, new_list and view_list through the test client '
+        'against deterministic lists of the given sizes, and print p50/p95/p99 '
+        'latency, queries per request and peak memory as JSON. Runs against a '
+        'throwaway test database unless --in-place is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=DEFAULT_SIZES,
+            help=f'Comma-separated list sizes to seed (default {DEFAULT_SIZES}).')
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Timed requests per scenario.')
+        parser.add_argument(
+            '--memory-requests', type=int, default=3,
+            help='Extra requests per scenario traced for peak memory.')
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Seed into the configured database instead of a test one.')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        old_name = None
+        if not options['in_place']:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                    RATE_LIMIT_ENABLED=False):
+                report = self.run_benchmarks(sizes, options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+
+    def run_benchmarks(self, sizes, options):
+        client = Client()
+        report = {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'scenarios': {},
+        }
+        scenarios = report['scenarios']
+        counter = iter(range(10 ** 9))
+
+        scenarios['home_page GET'] = self.measure(
+            lambda: client.get('/'), options)
+        scenarios['new_list POST'] = self.measure(
+            lambda: client.post('/lists/new', {'text': f'new {next(counter)}'}),
+            options)
+
+        for size in sizes:
+            list_ = self.seed(size)
+            url = list_.get_absolute_url()
+            scenarios[f'view_list GET {size}'] = self.measure(
+                lambda: client.get(url), options)
+            scenarios[f'view_list GET {size} uncached'] = self.measure(
+                lambda: client.get(url), options, before=cache.clear)
+            scenarios[f'view_list POST {size}'] = self.measure(
+                lambda: client.post(url, {'text': f'bench {next(counter)}'}),
+                options)
+        return report
+
+    def seed(self, size):
+        list_ = List.objects.create()
+        for start in range(0, size, SEED_CHUNK):
+            texts = [
+                f'item {n}' for n in range(start, min(start + SEED_CHUNK, size))
+            ]
+            save_items_in_bulk(list_, texts)
+        return list_
+
+    def measure(self, request, options, before=None):
+        latencies = []
+        queries = []
+        for _ in range(options['requests']):
+            if before:
+                before()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                request()
+                latencies.append(time.perf_counter() - start)
+            queries.append(len(captured))
+
+        peak = 0
+        for _ in range(options['memory_requests']):
+            if before:
+                before()
+            tracemalloc.start()
+            try:
+                request()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+
+        return {
+            'p50_ms': round(_percentile(latencies, 50) * 1000, 3),
+            'p95_ms': round(_percentile(latencies, 95) * 1000, 3),
+            'p99_ms': round(_percentile(latencies, 99) * 1000, 3),
+            'queries': max(queries),
+            'peak_kb': round(peak / 1024, 1),
+        }
@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers import sort_dependencies
+from django.db import connections, transaction
+
+DEFAULT_APPS = ('accounts', 'lists')
+
+
+@contextmanager
+def _keeping_timestamps(model):
+    # bulk_create runs pre_save, which would stamp auto_now(_add) fields
+    # with the time of the copy instead of keeping the source's values
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy rows from one configured database to another in primary-key '
+        'batches, e.g. from the "legacy" SQLite file (DJANGO_DB_COPY_FROM) '
+        'into a freshly migrated PostgreSQL "default".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('app_label', nargs='*')
+        parser.add_argument('--source', default='legacy')
+        parser.add_argument('--target', default='default')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *app_labels, **options):
+        source, target = options['source'], options['target']
+        for alias in (source, target):
+            if alias not in connections.databases:
+                raise CommandError(f'No database configured as {alias!r}.')
+
+        app_labels = app_labels or [
+            label for label in DEFAULT_APPS if apps.is_installed(label)
+        ]
+        models = sort_dependencies(
+            [(apps.get_app_config(label), None) for label in app_labels])
+        for model in models:
+            if model._default_manager.using(target).exists():
+                raise CommandError(
+                    f'{model._meta.db_table} in {target!r} is not empty.')
+
+        for model in models:
+            copied = self.copy_model(
+                model, source, target, options['batch_size'])
+            self.stdout.write(f'{model._meta.db_table}: {copied} rows')
+
+        with connections[target].cursor() as cursor:
+            for sql in connections[target].ops.sequence_reset_sql(
+                    no_style(), models):
+                cursor.execute(sql)
+
+    def copy_model(self, model, source, target, batch_size):
+        rows = model._default_manager.using(source).order_by('pk')
+        copied = 0
+        last_pk = None
+        while True:
+            batch = rows.filter(pk__gt=last_pk) if last_pk is not None else rows
+            batch = list(batch[:batch_size])
+            if not batch:
+                return copied
+            with transaction.atomic(using=target), _keeping_timestamps(model):
+                model._default_manager.using(target).bulk_create(batch)
+            copied += len(batch)
+            last_pk = batch[-1].pk
@@ -0,0 +1,15 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from lists import cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Print the list table fragment cache hit and miss counts, summed '
+        'over every worker through the shared cache (FRAGMENT_STATS_CACHE).'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(cache.stats()))
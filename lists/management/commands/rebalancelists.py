@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from lists.models import List
+
+
+class Command(BaseCommand):
+    help = (
+        'Respace the item positions of lists whose keys have grown long from '
+        'repeated moves into the same gap (List.needs_rebalance), one list per '
+        'transaction. Run it from cron; moves keep working in the meantime.'
+    )
+
+    def handle(self, *args, **options):
+        rebalanced = 0
+        for list_id in List.objects.filter(needs_rebalance=True).values_list(
+                'id', flat=True).iterator():
+            List(id=list_id).rebalance()
+            rebalanced += 1
+        self.stdout.write(f'Rebalanced {rebalanced} lists.')
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from lists.search import install_sqlite_triggers
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the item full-text search index from lists_item, one batch '
+        'of items per transaction so writers are never locked out for long. '
+        'Items added meanwhile are indexed by the triggers; edits and deletes '
+        'of not yet reindexed items can leave stale entries, so prefer a '
+        'quiet period.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('REINDEX INDEX lists_item_text_search')
+            self.stdout.write('Reindexed lists_item_text_search.')
+            return
+
+        batch_size = options['batch_size']
+        with transaction.atomic(), connection.cursor() as cursor:
+            install_sqlite_triggers(cursor)
+            cursor.execute(
+                "INSERT INTO lists_item_fts (lists_item_fts) VALUES ('delete-all')")
+            # anything newer is indexed by the insert trigger
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM lists_item')
+            max_id = cursor.fetchone()[0]
+        indexed = last_id = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT MAX(id), COUNT(*) FROM ('
+                    '  SELECT id FROM lists_item WHERE id > %s AND id <= %s'
+                    '  ORDER BY id LIMIT %s)',
+                    [last_id, max_id, batch_size]
+                )
+                upper_id, count = cursor.fetchone()
+                if not count:
+                    break
+                cursor.execute(
+                    'INSERT INTO lists_item_fts (rowid, text) '
+                    'SELECT id, text FROM lists_item '
+                    'WHERE id > %s AND id <= %s',
+                    [last_id, upper_id]
+                )
+            indexed += count
+            last_id = upper_id
+        self.stdout.write(f'Indexed {indexed} items.')
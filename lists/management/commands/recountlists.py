@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from lists.models import Item, List
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute List.item_count from lists_item, a batch of lists at a '
+        'time, and fix any list whose stored count has drifted. Items carry '
+        'no timestamps, so updated_at is only moved forward on fixed lists.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        counts = (
+            Item.objects.filter(list=OuterRef('pk')).order_by()
+            .values('list').annotate(count=Count('id')).values('count')
+        )
+        actual = Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+        last_id = 0
+        checked = fixed = 0
+        while True:
+            ids = list(
+                List.objects.filter(id__gt=last_id).order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # counting inside the UPDATE keeps each fix atomic with respect
+            # to items being added concurrently
+            # archived lists have no rows in lists_item to count
+            fixed += (
+                List.objects.filter(id__in=ids, archived=False)
+                .exclude(item_count=actual)
+                .update(
+                    item_count=actual,
+                    version=F('version') + 1,
+                    updated_at=timezone.now(),
+                )
+            )
+            checked += len(ids)
+            last_id = ids[-1]
+        self.stdout.write(f'Checked {checked} lists, fixed {fixed}.')
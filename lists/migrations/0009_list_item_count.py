@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 04:08
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def count_items(apps, schema_editor):
+    List = apps.get_model('lists', 'List')
+    Item = apps.get_model('lists', 'Item')
+    db_alias = schema_editor.connection.alias
+    counts = (
+        Item.objects.using(db_alias).order_by().values_list('list_id')
+        .annotate(models.Count('id'))
+    )
+    for list_id, item_count in counts.iterator():
+        List.objects.using(db_alias).filter(pk=list_id).update(
+            item_count=item_count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0008_list_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 04:09
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_item_text(text):
+    # Frozen copy of lists.models.hash_item_text as it was for this
+    # migration (LISTS_LOOSE_DUPLICATES off).
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_texts(apps, schema_editor):
+    Item = apps.get_model('lists', 'Item')
+    items = Item.objects.using(schema_editor.connection.alias)
+    last_id = 0
+    while True:
+        batch = list(
+            items.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'text')[:1000]
+        )
+        for item_id, text in batch:
+            items.filter(pk=item_id).update(
+                text_hash=hash_item_text(text))
+        if len(batch) < 1000:
+            return
+        last_id = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0009_list_item_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='text_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(hash_texts, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='item',
+            unique_together=set([('list', 'text_hash')]),
+        ),
+    ]
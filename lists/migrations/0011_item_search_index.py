@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 04:20
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+# Frozen copy of lists.search.SQLITE_TRIGGERS as of this migration.
+SQLITE_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS lists_item_fts_insert
+       AFTER INSERT ON lists_item BEGIN
+           INSERT INTO lists_item_fts (rowid, text) VALUES (new.id, new.text);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS lists_item_fts_delete
+       AFTER DELETE ON lists_item BEGIN
+           INSERT INTO lists_item_fts (lists_item_fts, rowid, text)
+           VALUES ('delete', old.id, old.text);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS lists_item_fts_update
+       AFTER UPDATE OF text ON lists_item BEGIN
+           INSERT INTO lists_item_fts (lists_item_fts, rowid, text)
+           VALUES ('delete', old.id, old.text);
+           INSERT INTO lists_item_fts (rowid, text) VALUES (new.id, new.text);
+       END''',
+]
+
+
+def install_sqlite_triggers(cursor):
+    for sql in SQLITE_TRIGGERS:
+        cursor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute(
+                "CREATE VIRTUAL TABLE lists_item_fts USING fts5("
+                "text, content='lists_item', content_rowid='id')"
+            )
+            install_sqlite_triggers(cursor)
+            cursor.execute(
+                "INSERT INTO lists_item_fts (lists_item_fts) VALUES ('rebuild')")
+        elif vendor == 'postgresql':
+            cursor.execute(
+                "CREATE INDEX lists_item_text_search ON lists_item "
+                "USING gin (to_tsvector('simple', text))"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS lists_item_fts_{trigger}')
+            cursor.execute('DROP TABLE IF EXISTS lists_item_fts')
+        elif vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS lists_item_text_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0010_item_text_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
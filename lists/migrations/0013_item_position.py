@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 04:31
+from __future__ import unicode_literals
+
+import json
+import zlib
+
+from django.db import migrations, models
+
+# Frozen copies of lists.positions and lists.search as of this migration.
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+FIRST_KEY = 'a0'
+
+
+def _increment(integer):
+    # only ever called on keys from a0 upwards
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) + 1
+        if d < len(DIGITS):
+            digits[i] = DIGITS[d]
+            return head + ''.join(digits)
+        digits[i] = DIGITS[0]
+    return chr(ord(head) + 1) + ''.join(digits) + DIGITS[0]
+
+
+def keys_after(a, count):
+    # a is always None here: count ascending keys from the start
+    keys = []
+    key = FIRST_KEY
+    for _ in range(count):
+        keys.append(key)
+        key = _increment(key)
+    return keys
+
+
+# Frozen copy of lists.search.SQLITE_TRIGGERS as of this migration.
+SQLITE_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS lists_item_fts_insert
+       AFTER INSERT ON lists_item BEGIN
+           INSERT INTO lists_item_fts (rowid, text) VALUES (new.id, new.text);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS lists_item_fts_delete
+       AFTER DELETE ON lists_item BEGIN
+           INSERT INTO lists_item_fts (lists_item_fts, rowid, text)
+           VALUES ('delete', old.id, old.text);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS lists_item_fts_update
+       AFTER UPDATE OF text ON lists_item BEGIN
+           INSERT INTO lists_item_fts (lists_item_fts, rowid, text)
+           VALUES ('delete', old.id, old.text);
+           INSERT INTO lists_item_fts (rowid, text) VALUES (new.id, new.text);
+       END''',
+]
+
+
+def install_sqlite_triggers(cursor):
+    for sql in SQLITE_TRIGGERS:
+        cursor.execute(sql)
+
+
+def use_bytewise_collation(apps, schema_editor):
+    # Position keys mix upper and lower case (see lists.positions).
+    if schema_editor.connection.vendor == 'postgresql':
+        with schema_editor.connection.cursor() as cursor:
+            for table, column in (('lists_item', 'position'),
+                                  ('lists_list', 'last_position')):
+                cursor.execute(
+                    f'ALTER TABLE {table} ALTER COLUMN {column} '
+                    f'TYPE varchar(255) COLLATE "C"'
+                )
+
+
+def number_items(apps, schema_editor):
+    # Existing lists keep their id order.
+    db_alias = schema_editor.connection.alias
+    List = apps.get_model('lists', 'List')
+    Item = apps.get_model('lists', 'Item')
+    ArchivedList = apps.get_model('lists', 'ArchivedList')
+    for list_id in List.objects.using(db_alias).values_list('id', flat=True).iterator():
+        ids = list(
+            Item.objects.using(db_alias).filter(list_id=list_id)
+            .order_by('id').values_list('id', flat=True)
+        )
+        keys = keys_after(None, len(ids))
+        for item_id, key in zip(ids, keys):
+            Item.objects.using(db_alias).filter(pk=item_id).update(position=key)
+        if keys:
+            List.objects.using(db_alias).filter(pk=list_id).update(
+                last_position=keys[-1])
+    for archive in ArchivedList.objects.using(db_alias).iterator():
+        rows = json.loads(zlib.decompress(bytes(archive.items)).decode('utf-8'))
+        keys = keys_after(None, len(rows))
+        rows = [[id_, text, key] for (id_, text), key in zip(rows, keys)]
+        data = json.dumps(rows, separators=(',', ':'), ensure_ascii=False)
+        archive.items = zlib.compress(data.encode('utf-8'), 9)
+        archive.save(update_fields=['items'])
+        if keys:
+            List.objects.using(db_alias).filter(pk=archive.list_id).update(
+                last_position=keys[-1])
+
+
+def reinstall_search_triggers(apps, schema_editor):
+    # SQLite rebuilt lists_item for the new column, dropping its triggers.
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            install_sqlite_triggers(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0012_list_archived'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='item',
+            options={'ordering': ('position', 'id')},
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='position',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='last_position',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='needs_rebalance',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(use_bytewise_collation, migrations.RunPython.noop),
+        migrations.RunPython(number_items, migrations.RunPython.noop),
+        migrations.RunPython(reinstall_search_triggers, reinstall_search_triggers),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['list', 'position', 'id'], name='lists_item_list_id_8acdfe_idx'),
+        ),
+    ]
@@ -1,20 +1,270 @@
+import hashlib
+import json
+import zlib
+
+from django.conf import settings
 from django.core.urlresolvers import reverse
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from lists.positions import key_between, keys_after
+from superlists import routers
+
+POSITION_MAX_LENGTH = 255
+# Keys longer than this mean many items have been dropped into one gap;
+# the list is flagged for manage.py rebalancelists.
+REBALANCE_KEY_LENGTH = 32
+# ids per DELETE when archiving, under SQLite's 999 parameter limit
+ARCHIVE_DELETE_BATCH = 500
+
+
+def _at_least_zero(expression):
+    return Greatest(expression, models.Value(0))
+
+
+# The leading position bound is implied by the OR, but SQLite can only turn
+# a plain comparison into an index range; without it every keyset query
+# scans the list from its first item.
+def _following(position, id_):
+    return models.Q(position__gte=position) & (
+        models.Q(position__gt=position) | models.Q(position=position, id__gt=id_))
+
+
+def _preceding(position, id_):
+    return models.Q(position__lte=position) & (
+        models.Q(position__lt=position) | models.Q(position=position, id__lt=id_))
 
 
 class List(models.Model):
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    item_count = models.PositiveIntegerField(default=0)
+    archived = models.BooleanField(default=False)
+    # No item's position is greater, so new items can be appended without
+    # first looking up the last one.
+    last_position = models.CharField(
+        max_length=POSITION_MAX_LENGTH, default='', editable=False)
+    needs_rebalance = models.BooleanField(default=False)
 
     def get_absolute_url(self):
         return reverse('lists:view', args=[self.id])
 
+    @staticmethod
+    def touch(list_id, added=0, position=None):
+        changes = {
+            'version': models.F('version') + 1,
+            'updated_at': timezone.now(),
+            'item_count': models.F('item_count') + added,
+        }
+        if added < 0:
+            # the count is denormalized and may have drifted; never below 0
+            changes['item_count'] = _at_least_zero(changes['item_count'])
+        if position:
+            changes['last_position'] = Greatest(
+                'last_position', models.Value(position, models.CharField()))
+            if len(position) > REBALANCE_KEY_LENGTH:
+                changes['needs_rebalance'] = True
+        List.objects.filter(pk=list_id).update(**changes)
+
+    def iter_items(self, *fields, chunk_size=2000):
+        """Yield (id, *fields) tuples for every item in order, one chunk at
+        a time.
+
+        Each chunk is a keyset range scan on the (list, position, id) index,
+        so memory stays flat however long the list is.
+        """
+        items = self.item_set.all()
+        while True:
+            rows = list(items.values_list('position', 'id', *fields)[:chunk_size])
+            yield from (row[1:] for row in rows)
+            if len(rows) < chunk_size:
+                return
+            items = self.item_set.filter(_following(*rows[-1][:2]))
+
+    def rebalance(self):
+        """Respace the positions of this list's items as a0, a1, ...,
+        keeping their order."""
+        with transaction.atomic():
+            rows = list(self.item_set.values_list('id', 'position'))
+            keys = keys_after(None, len(rows))
+            for (id_, position), key in zip(rows, keys):
+                if position != key:
+                    Item.objects.filter(pk=id_).update(position=key)
+            List.objects.filter(pk=self.pk).update(
+                last_position=keys[-1] if keys else '',
+                needs_rebalance=False,
+                version=models.F('version') + 1,
+                updated_at=timezone.now(),
+            )
+
+    def archive(self, idle_since):
+        """Move this list's items out of lists_item into one compressed
+        ArchivedList row, unless the list has been updated since idle_since.
+        Return whether it was archived.
+
+        Item ids are kept, so links and cursors into the list still work
+        once it is unarchived. Neither the version nor updated_at changes.
+        """
+        using = router.db_for_write(List)
+        with transaction.atomic(using=using):
+            # Claim the list first: this takes the write lock, so no item
+            # can slip in between reading the items and deleting them.
+            claimed = List.objects.using(using).filter(
+                pk=self.pk, archived=False, updated_at__lt=idle_since,
+            ).update(archived=True)
+            if not claimed:
+                return False
+            rows = list(
+                Item.objects.using(using).filter(list_id=self.pk)
+                .values_list('id', 'text', 'position')
+            )
+            ArchivedList.objects.using(using).create(
+                list_id=self.pk, items=ArchivedList.pack(rows))
+            # A plain DELETE: the ORM's would fire post_delete, and so
+            # List.touch, once per item. Only the rows just archived go; an
+            # item a racing write inserted stays put (see unarchive).
+            ids = [row[0] for row in rows]
+            with connections[using].cursor() as cursor:
+                for start in range(0, len(ids), ARCHIVE_DELETE_BATCH):
+                    batch = ids[start:start + ARCHIVE_DELETE_BATCH]
+                    cursor.execute(
+                        f'DELETE FROM {Item._meta.db_table} WHERE id IN'
+                        f' ({", ".join(["%s"] * len(batch))})',
+                        batch,
+                    )
+        self.archived = True
+        return True
+
+    def unarchive(self):
+        """Put an archived list's items back into lists_item.
+
+        A write that raced the archiving may have added an item with the
+        same text as an archived one; the archived copy is then dropped.
+        Reads for the rest of the request go to the primary, as a replica
+        won't have the restored items yet.
+        """
+        using = router.db_for_write(List)
+        with transaction.atomic(using=using):
+            archive = ArchivedList.objects.using(using).filter(
+                list_id=self.pk).first()
+            # Whoever deletes the archive row restores it; a request racing
+            # us finds nothing left to do.
+            if archive and ArchivedList.objects.using(using).filter(
+                    list_id=self.pk).delete()[0]:
+                taken = set(
+                    Item.objects.using(using).filter(list_id=self.pk)
+                    .values_list('text_hash', flat=True)
+                )
+                rows = archive.unpack()
+                items = []
+                for id_, text, position in rows:
+                    text_hash = hash_item_text(text)
+                    if text_hash not in taken:
+                        items.append(Item(
+                            id=id_, list_id=self.pk, text=text,
+                            text_hash=text_hash, position=position))
+                Item.objects.using(using).bulk_create(items)
+                if len(items) < len(rows):
+                    List.objects.using(using).filter(pk=self.pk).update(
+                        item_count=_at_least_zero(
+                            models.F('item_count') - (len(rows) - len(items))))
+            List.objects.using(using).filter(pk=self.pk).update(archived=False)
+        self.archived = False
+        routers.set_read_replica(False)
+
+
+def hash_item_text(text):
+    """Fixed-width key for the (list, text_hash) unique index.
+
+    With LISTS_LOOSE_DUPLICATES on, texts that differ only in case or
+    whitespace hash alike and so count as duplicates.
+    """
+    if getattr(settings, 'LISTS_LOOSE_DUPLICATES', False):
+        text = ' '.join(text.split()).casefold()
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
 
 class Item(models.Model):
     text = models.TextField(default='')
+    text_hash = models.CharField(max_length=64, editable=False)
     list = models.ForeignKey('List', default=None)
+    # A lexicographic rank key (see lists.positions). Two items appended at
+    # the same moment can share one; id breaks the tie.
+    position = models.CharField(
+        max_length=POSITION_MAX_LENGTH, default='', editable=False)
 
     class Meta:
-        ordering = ('id',)
-        unique_together = ('list', 'text')
+        ordering = ('position', 'id')
+        unique_together = ('list', 'text_hash')
+        indexes = [
+            models.Index(fields=['list', 'id']),
+            models.Index(fields=['list', 'position', 'id']),
+        ]
+
+    def clean(self):
+        self.text_hash = hash_item_text(self.text)
+
+    def save(self, *args, **kwargs):
+        self.text_hash = hash_item_text(self.text)
+        if not self.position:
+            self.position = key_between(self.list.last_position or None, None)
+            self.list.last_position = self.position
+        # keeps the insert and the post_save List.touch in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def move(self, after=None, before=None):
+        """Put this item just after the item `after`, or just before the
+        item `before`, or at the top of the list if given neither.
+
+        Only this item's row is rewritten (plus the List.touch). If its new
+        neighbours share a position, or the gap between them has run out of
+        short keys, the list is rebalanced first.
+        """
+        siblings = Item.objects.filter(list_id=self.list_id).exclude(pk=self.pk)
+        if after is not None:
+            low = after
+            high = siblings.filter(_following(after.position, after.id)).first()
+        elif before is not None:
+            low = siblings.filter(_preceding(before.position, before.id)).last()
+            high = before
+        else:
+            low, high = None, siblings.first()
+        low_key = low.position if low else None
+        high_key = high.position if high else None
+
+        if low_key is not None and high_key is not None and low_key >= high_key:
+            position = None
+        else:
+            position = key_between(low_key, high_key)
+        if position is None or len(position) > POSITION_MAX_LENGTH:
+            List(id=self.list_id).rebalance()
+            for neighbour in (after, before):
+                if neighbour is not None:
+                    neighbour.refresh_from_db(fields=['position'])
+            return self.move(after=after, before=before)
+
+        self.position = position
+        with transaction.atomic():
+            Item.objects.filter(pk=self.pk).update(position=position)
+            List.touch(self.list_id, position=position)
 
     def __str__(self):
         return self.text
+
+
+class ArchivedList(models.Model):
+    """The items of a list that has gone cold, as one zlib-compressed JSON
+    array of [id, text, position] triples."""
+    list = models.OneToOneField(List, primary_key=True, on_delete=models.CASCADE)
+    items = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def pack(rows):
+        data = json.dumps(rows, separators=(',', ':'), ensure_ascii=False)
+        return zlib.compress(data.encode('utf-8'), 9)
+
+    def unpack(self):
+        return json.loads(zlib.decompress(bytes(self.items)).decode('utf-8'))
@@ -0,0 +1,131 @@
+"""Lexicographic rank keys for ordering items.
+
+A key is an "integer" part, whose length is given by its first character
+(a-z for a0..zzz…, A-Z below a0), followed by an optional fraction with no
+trailing zeros. Keys compare as plain strings, there is always another key
+between any two, and appending only ever increments the integer part, so
+keys stay short unless many items are dropped into the same gap (see
+List.needs_rebalance). After David Greenspan's "Implementing Fractional
+Indexing".
+
+Keys mix upper and lower case, so the column must compare bytewise: SQLite
+does by default, and migration 0013 gives PostgreSQL COLLATE "C".
+"""
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+FIRST_KEY = 'a0'
+SMALLEST_INTEGER = 'A' + DIGITS[0] * 26
+
+
+def _midpoint(a, b):
+    # a < b as fractions, with b None meaning 1; neither ends in a zero
+    if b is not None:
+        n = 0
+        while (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _integer_length(head):
+    if 'a' <= head <= 'z':
+        return ord(head) - ord('a') + 2
+    if 'A' <= head <= 'Z':
+        return ord('Z') - ord(head) + 2
+    raise ValueError(f'Invalid position key head: {head!r}')
+
+
+def _split(key):
+    length = _integer_length(key[0])
+    if length > len(key) or key == SMALLEST_INTEGER:
+        raise ValueError(f'Invalid position key: {key!r}')
+    integer, fraction = key[:length], key[length:]
+    if fraction.endswith(DIGITS[0]):
+        raise ValueError(f'Invalid position key: {key!r}')
+    return integer, fraction
+
+
+def _increment(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) + 1
+        if d < len(DIGITS):
+            digits[i] = DIGITS[d]
+            return head + ''.join(digits)
+        digits[i] = DIGITS[0]
+    if head == 'Z':
+        return 'a' + DIGITS[0]
+    if head == 'z':
+        return None
+    head = chr(ord(head) + 1)
+    if head > 'a':
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + ''.join(digits)
+
+
+def _decrement(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) - 1
+        if d >= 0:
+            digits[i] = DIGITS[d]
+            return head + ''.join(digits)
+        digits[i] = DIGITS[-1]
+    if head == 'a':
+        return 'Z' + DIGITS[-1]
+    if head == 'A':
+        return None
+    head = chr(ord(head) - 1)
+    if head < 'Z':
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + ''.join(digits)
+
+
+def key_between(a, b):
+    """Return a key that sorts after a and before b. Either may be None for
+    "the start" or "the end"."""
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f'{a!r} is not before {b!r}')
+    if a is None and b is None:
+        return FIRST_KEY
+    if a is None:
+        integer, fraction = _split(b)
+        if integer == SMALLEST_INTEGER:
+            return integer + _midpoint('', fraction)
+        if integer < b:
+            return integer
+        key = _decrement(integer)
+        if key is None:
+            raise ValueError('Ran out of position keys at the start')
+        return key
+    integer, fraction = _split(a)
+    if b is None:
+        key = _increment(integer)
+        return key if key is not None else integer + _midpoint(fraction, None)
+    b_integer, b_fraction = _split(b)
+    if integer == b_integer:
+        return integer + _midpoint(fraction, b_fraction)
+    key = _increment(integer)
+    if key is not None and key < b:
+        return key
+    return integer + _midpoint(fraction, None)
+
+
+def keys_after(a, count):
+    """Return count ascending keys, all after a (None for the start)."""
+    keys = []
+    for _ in range(count):
+        a = key_between(a, None)
+        keys.append(a)
+    return keys
@@ -0,0 +1,105 @@
+import fcntl
+import math
+import os
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+
+def _cache():
+    return caches[settings.RATE_LIMIT_CACHE]
+
+
+def client_ip(request):
+    return (
+        request.META.get(settings.CLIENT_IP_HEADER)
+        or request.META.get('REMOTE_ADDR', '')
+    )
+
+
+def take(key, rate, burst, now=None):
+    """Take one token from the bucket at key, which refills at rate tokens
+    per second up to burst. Return 0 if there was one, otherwise how many
+    seconds until there will be.
+
+    The bucket is kept as its "theoretical arrival time" (GCRA), so it is
+    a single value in the shared RATE_LIMIT_CACHE. Two workers updating
+    the same bucket at the same moment can each let a request through;
+    the limit is approximate by at most that much.
+    """
+    now = time.time() if now is None else now
+    interval = 1 / rate
+    tolerance = burst * interval
+    arrival = max(_cache().get(key, now), now) + interval
+    wait = arrival - tolerance - now
+    if wait > 0:
+        return wait
+    _cache().set(key, arrival, math.ceil(tolerance) + 1)
+    return 0
+
+
+def _enter():
+    """Take one of WRITE_CONCURRENCY_LIMIT slots, each an flock()ed file
+    in WRITE_SLOTS_DIR, and return it open; None if all are taken.
+
+    The kernel releases a slot when its file is closed, including when a
+    worker dies mid-request, so the count can't drift.
+    """
+    os.makedirs(settings.WRITE_SLOTS_DIR, exist_ok=True)
+    for slot in range(settings.WRITE_CONCURRENCY_LIMIT):
+        slot_file = open(os.path.join(settings.WRITE_SLOTS_DIR, f'slot-{slot}'), 'a')
+        try:
+            fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            slot_file.close()
+        else:
+            return slot_file
+    return None
+
+
+def _leave(slot_file):
+    slot_file.close()
+
+
+def _too_many_requests(request, retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    message = f'Too many requests, please try again in {seconds}s.'
+    if request.is_ajax():
+        response = JsonResponse({'errors': [message]}, status=429)
+    else:
+        response = HttpResponse(message, content_type='text/plain', status=429)
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def limit_writes(view):
+    """Admission control for views that write.
+
+    POSTs take a token from the client IP's bucket and, for views with a
+    list_id, from that list's bucket (see settings.RATE_LIMITS), and count
+    against WRITE_CONCURRENCY_LIMIT while they run, across all workers.
+    Anything over a limit gets a 429 with Retry-After. Other methods pass
+    straight through.
+    """
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        if request.method != 'POST' or not settings.RATE_LIMIT_ENABLED:
+            return view(request, *args, **kwargs)
+
+        wait = take(f'ratelimit:ip:{client_ip(request)}', *settings.RATE_LIMITS['ip'])
+        if not wait and 'list_id' in kwargs:
+            wait = take(
+                f"ratelimit:list:{kwargs['list_id']}", *settings.RATE_LIMITS['list'])
+        if wait:
+            return _too_many_requests(request, wait)
+
+        slot = _enter()
+        if slot is None:
+            return _too_many_requests(request, 1)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _leave(slot)
+    return inner
@@ -0,0 +1,73 @@
+"""
+Full-text search over item texts.
+
+SQLite keeps an external-content FTS5 table, lists_item_fts, in step with
+lists_item through triggers. PostgreSQL searches a GIN expression index over
+to_tsvector('simple', text). Both rank results and match every search term
+as a prefix.
+"""
+import re
+
+from django.db import connection
+
+from lists.models import Item
+
+TERM_RE = re.compile(r'\w+')
+
+SQLITE_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS lists_item_fts_insert
+       AFTER INSERT ON lists_item BEGIN
+           INSERT INTO lists_item_fts (rowid, text) VALUES (new.id, new.text);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS lists_item_fts_delete
+       AFTER DELETE ON lists_item BEGIN
+           INSERT INTO lists_item_fts (lists_item_fts, rowid, text)
+           VALUES ('delete', old.id, old.text);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS lists_item_fts_update
+       AFTER UPDATE OF text ON lists_item BEGIN
+           INSERT INTO lists_item_fts (lists_item_fts, rowid, text)
+           VALUES ('delete', old.id, old.text);
+           INSERT INTO lists_item_fts (rowid, text) VALUES (new.id, new.text);
+       END''',
+]
+
+SQLITE_SEARCH = '''
+    SELECT lists_item.id, lists_item.list_id, lists_item.text
+    FROM lists_item_fts
+    JOIN lists_item ON lists_item.id = lists_item_fts.rowid
+    WHERE lists_item_fts MATCH %s
+    ORDER BY bm25(lists_item_fts), lists_item.id
+    LIMIT %s OFFSET %s
+'''
+
+POSTGRESQL_SEARCH = '''
+    SELECT id, list_id, text
+    FROM lists_item
+    WHERE to_tsvector('simple', text) @@ to_tsquery('simple', %s)
+    ORDER BY ts_rank(to_tsvector('simple', text), to_tsquery('simple', %s)) DESC,
+             id
+    LIMIT %s OFFSET %s
+'''
+
+
+def install_sqlite_triggers(cursor):
+    """(Re)create the FTS5 sync triggers.
+
+    SQLite migrations that remake lists_item drop its triggers along with
+    the old table, so those migrations call this again afterwards.
+    """
+    for sql in SQLITE_TRIGGERS:
+        cursor.execute(sql)
+
+
+def search_items(query, limit, offset=0):
+    terms = TERM_RE.findall(query)
+    if not terms:
+        return []
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        params = [tsquery, tsquery, limit, offset]
+        return list(Item.objects.raw(POSTGRESQL_SEARCH, params))
+    match = ' '.join(f'"{term}"*' for term in terms)
+    return list(Item.objects.raw(SQLITE_SEARCH, [match, limit, offset]))
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from lists.models import Item, List
+
+
+@receiver(post_init, sender=Item)
+def item_loaded(sender, instance, **kwargs):
+    # so a save can tell the item has moved to another list
+    instance._saved_list_id = instance.list_id
+
+
+@receiver(post_save, sender=Item)
+def item_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        moved_from = instance._saved_list_id
+        if created:
+            List.touch(instance.list_id, added=1, position=instance.position)
+        elif moved_from is not None and moved_from != instance.list_id:
+            List.touch(moved_from, added=-1)
+            List.touch(instance.list_id, added=1, position=instance.position)
+        else:
+            List.touch(instance.list_id)
+    instance._saved_list_id = instance.list_id
+
+
+@receiver(post_delete, sender=Item)
+def item_deleted(sender, instance, **kwargs):
+    List.touch(instance.list_id, added=-1)
@@ -1,6 +1,156 @@
 window.Superlists = {};
+
+window.Superlists.showErrors = function ($form, errors) {
+  var $error = $form.find('.has-error');
+  if (!$error.length) {
+    $error = $(
+      '<div class="form-group has-error"><span class="help-block"></span></div>'
+    ).appendTo($form);
+  }
+  $error.find('.help-block').text(errors.join(' '));
+  $error.show();
+};
+
+window.Superlists.getCsrfToken = function (url) {
+  var token = $.Deferred();
+  var match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+  if (match) {
+    token.resolve(decodeURIComponent(match[1]));
+  } else {
+    $.getJSON(url)
+      .done(function (data) {
+        token.resolve(data.token);
+      })
+      .fail(token.reject);
+  }
+  return token.promise();
+};
+
+window.Superlists.renumberRows = function ($table, first) {
+  $table.find('tr').each(function (index) {
+    var cell = this.cells[0].firstChild;
+    cell.nodeValue = cell.nodeValue.replace(/^\d+/, first + index);
+  });
+};
+
+// Drop $row next to $target, renumber the page and tell the server where
+// it went relative to its new neighbours.
+window.Superlists.moveRow = function ($table, $row, $target) {
+  var first = parseInt($table.find('tr').first().text(), 10);
+  if ($row.index() < $target.index()) {
+    $row.insertAfter($target);
+  } else {
+    $row.insertBefore($target);
+  }
+  window.Superlists.renumberRows($table, first);
+
+  var data = {item: $row.data('item-id')};
+  if ($row.prev().length) {
+    data.after = $row.prev().data('item-id');
+  } else {
+    data.before = $row.next().data('item-id');
+  }
+  data.csrfmiddlewaretoken = $('input[name="csrfmiddlewaretoken"]').val();
+  return $.post($table.data('move-url'), data);
+};
+
+window.Superlists.initializeDragging = function ($table) {
+  var $dragged = null;
+  $table.on('dragstart', 'tr', function (event) {
+    $dragged = $(this);
+    event.originalEvent.dataTransfer.effectAllowed = 'move';
+    event.originalEvent.dataTransfer.setData('text/plain', $dragged.data('item-id'));
+  });
+  $table.on('dragover', 'tr', function (event) {
+    if ($dragged) {
+      event.preventDefault();
+    }
+  });
+  $table.on('drop', 'tr', function (event) {
+    event.preventDefault();
+    if ($dragged && this !== $dragged[0]) {
+      window.Superlists.moveRow($table, $dragged, $(this));
+    }
+    $dragged = null;
+  });
+  $table.find('tr').attr('draggable', 'true');
+};
+
+// Append items other people add to this list as they arrive.
+// The AJAX response and the event stream can both deliver a new item; only
+// the first to arrive is added.
+window.Superlists.appendRow = function ($table, row) {
+  var $row = $(row.trim());
+  var itemId = $row.data('item-id');
+  if (itemId !== undefined && $table.find('tr[data-item-id="' + itemId + '"]').length) {
+    return;
+  }
+  $row.attr('draggable', 'true');
+  $table.append($row);
+};
+
+window.Superlists.listenForItems = function ($table) {
+  if (!$table.length || !window.EventSource) {
+    return null;
+  }
+  var source = new window.EventSource($table.data('events-url'));
+  source.addEventListener('item', function (event) {
+    window.Superlists.appendRow($table, JSON.parse(event.data).row);
+  });
+  // too far behind to catch up item by item
+  source.addEventListener('reload', function () {
+    source.close();
+    window.location.reload();
+  });
+  return source;
+};
+
 window.Superlists.initialize = function () {
   $('input[name="text"]').on('keypress', function () {
     $('.has-error').hide();
   });
-};
\ No newline at end of file
+
+  // The cached home page leaves its CSRF token blank. Fill it in from the
+  // cookie, or from the server if there's no cookie yet, and hold back any
+  // submit that beats the request.
+  var $csrf = $('input[name="csrfmiddlewaretoken"][data-csrf-url]');
+  if ($csrf.length) {
+    var filled = window.Superlists.getCsrfToken($csrf.data('csrf-url'))
+      .done(function (token) {
+        $csrf.val(token);
+      });
+    $csrf.closest('form').one('submit', function (event) {
+      if (filled.state() === 'pending') {
+        event.preventDefault();
+        var form = this;
+        filled.always(function () {
+          form.submit();
+        });
+      }
+    });
+  }
+
+  window.Superlists.initializeDragging($('#id_list_table[data-move-url]'));
+  window.Superlists.listenForItems($('#id_list_table[data-events-url]'));
+
+  // Only the last page of a list carries data-add-url; everywhere else the
+  // form falls back to the normal POST-redirect-GET.
+  var $table = $('#id_list_table[data-add-url]');
+  if (!$table.length) {
+    return;
+  }
+  $('#id_item_form').on('submit', function (event) {
+    event.preventDefault();
+    var $form = $(this);
+    $.post($table.data('add-url'), $form.serialize())
+      .done(function (data) {
+        window.Superlists.appendRow($table, data.row);
+        $form.find('input[name="text"]').val('');
+        $form.find('.has-error').hide();
+      })
+      .fail(function (xhr) {
+        var errors = xhr.responseJSON ? xhr.responseJSON.errors : [];
+        window.Superlists.showErrors($form, errors);
+      });
+  });
+};
@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+from django.core.cache import cache as django_cache, caches
+from django.test import SimpleTestCase
+
+from lists import cache
+
+
+class GetOrRenderTest(SimpleTestCase):
+
+    def setUp(self):
+        django_cache.clear()
+        caches['shared'].clear()
+
+    def test_renders_on_miss_and_reuses_on_hit(self):
+        render = lambda: 'rendered'
+        self.assertEqual(cache.get_or_render('k', render), ('rendered', False))
+        self.assertEqual(cache.get_or_render('k', render), ('rendered', True))
+
+    def test_counts_hits_and_misses(self):
+        cache.get_or_render('k', lambda: 'rendered')
+        cache.get_or_render('k', lambda: 'rendered')
+        cache.get_or_render('k', lambda: 'rendered')
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 1})
+        # a separate process (manage.py) sees the counts even if the
+        # fragments are only cached in this one
+        django_cache.clear()
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 1})
+
+    def test_waits_for_lock_holder_instead_of_rendering(self):
+        django_cache.add('k:lock', 1)
+
+        def fill_cache(seconds):
+            django_cache.set('k', 'from lock holder')
+
+        render = lambda: self.fail('should not render')
+        with patch('lists.cache.time.sleep', side_effect=fill_cache):
+            self.assertEqual(
+                cache.get_or_render('k', render),
+                ('from lock holder', True)
+            )
+
+    @patch('lists.cache.LOCK_TIMEOUT', 0)
+    def test_renders_anyway_if_lock_holder_is_stuck(self):
+        django_cache.add('k:lock', 1)
+        self.assertEqual(
+            cache.get_or_render('k', lambda: 'rendered'), ('rendered', False))
+        self.assertTrue(django_cache.get('k:lock'))
+
+    def test_marks_cached_html_safe(self):
+        cache.get_or_render('k', lambda: '<tr></tr>')
+        html, hit = cache.get_or_render('k', lambda: '<tr></tr>')
+        self.assertTrue(hasattr(html, '__html__'))
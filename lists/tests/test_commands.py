@@ -0,0 +1,193 @@
+import datetime
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import TestCase
+from django.utils import timezone
+
+from lists import cache as fragments
+from lists.models import Item, List
+
+
+class RecountListsTest(TestCase):
+
+    def test_repairs_drifted_item_counts(self):
+        drifted = List.objects.create()
+        Item.objects.create(list=drifted, text='one')
+        Item.objects.create(list=drifted, text='two')
+        empty = List.objects.create()
+        List.objects.update(item_count=5)
+
+        out = StringIO()
+        call_command('recountlists', batch_size=1, stdout=out)
+
+        drifted.refresh_from_db()
+        empty.refresh_from_db()
+        self.assertEqual(drifted.item_count, 2)
+        self.assertEqual(empty.item_count, 0)
+        self.assertIn('Checked 2 lists, fixed 2.', out.getvalue())
+
+    def test_leaves_correct_lists_alone(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='one')
+        list_.refresh_from_db()
+
+        call_command('recountlists', stdout=StringIO())
+
+        version = list_.version
+        list_.refresh_from_db()
+        self.assertEqual(list_.version, version)
+
+
+class CopyDataTest(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        connections.databases['copy_target'] = {
+            'ENGINE': 'superlists.backends.sqlite3',
+            'NAME': os.path.join(self.tmp.name, 'target.sqlite3'),
+        }
+        call_command('migrate', database='copy_target', verbosity=0)
+
+    def tearDown(self):
+        connections['copy_target'].close()
+        del connections['copy_target']
+        del connections.databases['copy_target']
+        self.tmp.cleanup()
+
+    def copy(self, **options):
+        call_command(
+            'copydata', 'lists', source='default', target='copy_target',
+            stdout=StringIO(), **options
+        )
+
+    def test_copies_lists_and_items_in_batches(self):
+        list_ = List.objects.create()
+        items = [Item.objects.create(list=list_, text=f'item {i}')
+                 for i in range(5)]
+
+        self.copy(batch_size=2)
+
+        copied = List.objects.using('copy_target').get()
+        self.assertEqual(copied.id, list_.id)
+        self.assertEqual(copied.item_count, 5)
+        self.assertEqual(
+            list(Item.objects.using('copy_target').values_list('id', 'text')),
+            [(item.id, item.text) for item in items]
+        )
+
+    def test_keeps_timestamps(self):
+        list_ = List.objects.create()
+        last_year = timezone.now() - datetime.timedelta(days=365)
+        List.objects.update(updated_at=last_year)
+
+        self.copy()
+
+        self.assertEqual(
+            List.objects.using('copy_target').get(id=list_.id).updated_at,
+            last_year
+        )
+        self.assertTrue(List._meta.get_field('updated_at').auto_now)
+
+    def test_refuses_to_copy_into_a_non_empty_database(self):
+        List.objects.create()
+        self.copy()
+        with self.assertRaises(CommandError):
+            self.copy()
+
+
+class FragmentCacheStatsTest(TestCase):
+
+    def test_prints_counts_from_the_shared_cache(self):
+        caches['default'].clear()
+        caches['shared'].clear()
+        fragments.get_or_render('k', lambda: 'rendered')
+        out = StringIO()
+        call_command('fragmentcachestats', stdout=out)
+        self.assertEqual(json.loads(out.getvalue()), {'hits': 0, 'misses': 1})
+
+
+class BenchTest(TestCase):
+
+    def test_reports_each_scenario_as_json(self):
+        out = StringIO()
+        call_command(
+            'bench', sizes='3', requests=2, memory_requests=1, in_place=True,
+            stdout=out,
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['database'], 'sqlite')
+        self.assertEqual(set(report['scenarios']), {
+            'home_page GET', 'new_list POST', 'view_list GET 3',
+            'view_list GET 3 uncached', 'view_list POST 3',
+        })
+        for result in report['scenarios'].values():
+            self.assertEqual(
+                set(result), {'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'peak_kb'})
+        self.assertEqual(Item.objects.filter(text__startswith='item ').count(), 3)
+
+
+class ArchiveListsTest(TestCase):
+
+    def make_list(self, texts, days_idle):
+        list_ = List.objects.create()
+        for text in texts:
+            Item.objects.create(list=list_, text=text)
+        List.objects.filter(id=list_.id).update(
+            updated_at=timezone.now() - datetime.timedelta(days=days_idle))
+        return list_
+
+    def test_archives_only_idle_lists(self):
+        cold = self.make_list(['one', 'two'], days_idle=10)
+        warm = self.make_list(['three'], days_idle=1)
+
+        out = StringIO()
+        call_command('archivelists', idle_days=7, pause=0, stdout=out)
+
+        self.assertEqual(
+            list(Item.objects.values_list('text', flat=True)), ['three'])
+        cold.refresh_from_db()
+        self.assertTrue(cold.archived)
+        self.assertEqual(cold.item_count, 2)
+        self.assertEqual(cold.archivedlist.unpack()[1][1], 'two')
+        self.assertFalse(List.objects.get(id=warm.id).archived)
+        self.assertIn('Archived 1 lists (2 items).', out.getvalue())
+
+        call_command('recountlists', stdout=StringIO())
+        self.assertEqual(List.objects.get(id=cold.id).item_count, 2)
+
+    def test_archiving_keeps_version_and_updated_at(self):
+        cold = self.make_list(['one'], days_idle=10)
+        cold.refresh_from_db()
+        call_command('archivelists', pause=0, stdout=StringIO())
+        archived = List.objects.get(id=cold.id)
+        self.assertEqual(
+            (archived.version, archived.updated_at),
+            (cold.version, cold.updated_at),
+        )
+
+
+class RebalanceListsTest(TestCase):
+
+    def test_respaces_only_flagged_lists(self):
+        flagged = List.objects.create()
+        items = [Item.objects.create(list=flagged, text=t) for t in 'ab']
+        Item.objects.filter(id=items[1].id).update(position='a0zzzz')
+        List.objects.filter(id=flagged.id).update(needs_rebalance=True)
+        other = List.objects.create()
+        Item.objects.create(list=other, text='c')
+        Item.objects.filter(list=other).update(position='a0V')
+
+        out = StringIO()
+        call_command('rebalancelists', stdout=out)
+
+        self.assertEqual(
+            list(flagged.item_set.values_list('position', flat=True)), ['a0', 'a1'])
+        self.assertEqual(other.item_set.get().position, 'a0V')
+        self.assertIn('Rebalanced 1 lists.', out.getvalue())
@@ -0,0 +1,79 @@
+import sqlite3
+from unittest import skipUnless
+from unittest.mock import Mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from superlists.backends.sqlite3.pragmas import apply_pragmas
+
+
+class ApplyPragmasTest(SimpleTestCase):
+
+    def test_sets_each_pragma_on_the_connection(self):
+        conn = sqlite3.connect(':memory:')
+        apply_pragmas(conn, {'synchronous': 'NORMAL', 'busy_timeout': 1234})
+        self.assertEqual(conn.execute('PRAGMA synchronous').fetchone(), (1,))
+        self.assertEqual(conn.execute('PRAGMA busy_timeout').fetchone(), (1234,))
+
+    def test_rejects_malformed_pragma_names(self):
+        conn = sqlite3.connect(':memory:')
+        with self.assertRaises(ValueError):
+            apply_pragmas(conn, {'synchronous; DROP TABLE x': 'NORMAL'})
+
+
+class SQLiteProfileTest(TestCase):
+
+    def test_django_connections_get_the_profile(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0],
+                connection.settings_dict['PRAGMAS']['busy_timeout']
+            )
+
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+
+@skipUnless(psycopg2, 'psycopg2 is not installed')
+class PostgreSQLHealthCheckTest(SimpleTestCase):
+
+    def make_wrapper(self, health_checks=True):
+        from superlists.backends.postgresql.base import DatabaseWrapper
+        wrapper = DatabaseWrapper({
+            'NAME': 'superlists', 'USER': '', 'PASSWORD': '', 'HOST': '',
+            'PORT': '', 'OPTIONS': {}, 'AUTOCOMMIT': True,
+            'CONN_MAX_AGE': 60, 'TIME_ZONE': None,
+            'CONN_HEALTH_CHECKS': health_checks,
+        })
+        wrapper.connection = Mock()
+        wrapper.get_autocommit = Mock(return_value=True)
+        wrapper.connect = Mock()
+        return wrapper
+
+    def test_replaces_a_dead_connection_on_first_use_in_a_request(self):
+        wrapper = self.make_wrapper()
+        wrapper.is_usable = Mock(return_value=False)
+        wrapper.close_if_unusable_or_obsolete()
+        wrapper.ensure_connection()
+        wrapper.connect.assert_called_once_with()
+
+    def test_checks_only_once_per_request(self):
+        wrapper = self.make_wrapper()
+        wrapper.is_usable = Mock(return_value=True)
+        wrapper.close_if_unusable_or_obsolete()
+        wrapper.ensure_connection()
+        wrapper.ensure_connection()
+        self.assertEqual(wrapper.is_usable.call_count, 1)
+        wrapper.connect.assert_not_called()
+
+    def test_does_not_check_unless_enabled(self):
+        wrapper = self.make_wrapper(health_checks=False)
+        wrapper.is_usable = Mock()
+        wrapper.close_if_unusable_or_obsolete()
+        wrapper.ensure_connection()
+        wrapper.is_usable.assert_not_called()
@@ -0,0 +1,166 @@
+import asyncio
+import json
+from concurrent.futures import Executor, Future
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from lists.events import ListEvents
+from lists.models import Item, List
+from superlists.asgi import application
+
+
+class InlineExecutor(Executor):
+    # the test database only exists inside this thread's transaction
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class ListEventsTest(TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.hub = ListEvents(interval=0.01, executor=InlineExecutor())
+        self.addCleanup(self.stop_poller)
+        patcher = patch('superlists.asgi.hub', self.hub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.list_ = List.objects.create()
+        self.first = Item.objects.create(list=self.list_, text='first')
+
+    def stop_poller(self):
+        if self.hub.poller:
+            self.hub.poller.cancel()
+            self.loop.run_until_complete(asyncio.wait([self.hub.poller]))
+
+    def run_stream(self, scenario, path=None, headers=(), query=b''):
+        sent = asyncio.Queue()
+        disconnect = asyncio.Event()
+        requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def receive():
+            # as uvicorn does: the request body, then nothing until the
+            # client goes away
+            if requests:
+                return requests.pop()
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            await sent.put(message)
+
+        async def body():
+            await sent.get()  # the retry: preamble
+            message = await asyncio.wait_for(sent.get(), 1)
+            return message['body'].decode()
+
+        async def run():
+            scope = {
+                'type': 'http', 'method': 'GET',
+                'path': path or f'/lists/{self.list_.id}/events',
+                'headers': list(headers), 'query_string': query,
+            }
+            task = asyncio.ensure_future(application(scope, receive, send))
+            start = await sent.get()
+            try:
+                if start['status'] == 200:
+                    await scenario(body)
+            finally:
+                disconnect.set()
+                await asyncio.wait_for(task, 1)
+            return start
+
+        return self.loop.run_until_complete(run())
+
+    def test_pushes_items_added_after_subscribing(self):
+        async def scenario(body):
+            await asyncio.sleep(0.02)
+            item = Item.objects.create(list=List.objects.get(), text='second')
+            event = await body()
+            self.assertTrue(event.startswith(f'id: {item.id}\nevent: item\n'))
+            data = json.loads(event.split('data: ')[1])
+            self.assertEqual(data['id'], item.id)
+            self.assertIn('2: second', data['row'])
+
+        start = self.run_stream(scenario, query=f'since={self.first.id}'.encode())
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertEqual(self.hub.subscribers, {})
+
+    def test_keeps_streaming_after_the_request_message(self):
+        second = Item.objects.create(list=self.list_, text='second')
+
+        async def scenario(body):
+            await asyncio.sleep(0.02)
+            self.assertIn(f'id: {second.id}\n', await body())
+
+        self.run_stream(scenario, query=f'since={self.first.id}'.encode())
+
+    def test_tells_clients_too_far_behind_to_reload(self):
+        Item.objects.create(list=self.list_, text='second')
+        Item.objects.create(list=self.list_, text='third')
+
+        async def scenario(body):
+            self.assertEqual(await body(), 'event: reload\ndata: \n\n')
+
+        with patch('lists.events.CATCH_UP_LIMIT', 1):
+            self.run_stream(scenario, query=b'since=0')
+
+    def test_catches_up_from_last_event_id(self):
+        second = Item.objects.create(list=self.list_, text='second')
+
+        async def scenario(body):
+            self.assertIn(f'id: {second.id}\n', await body())
+
+        self.run_stream(
+            scenario, headers=[(b'last-event-id', str(self.first.id).encode())])
+
+    def test_one_query_per_poll_for_all_subscribers(self):
+        other = List.objects.create()
+
+        async def scenario():
+            await self.hub.subscribe(self.list_.id, self.first.id)
+            await self.hub.subscribe(self.list_.id, self.first.id)
+            await self.hub.subscribe(other.id, 0)
+            with self.assertNumQueries(1):
+                await self.hub._check_for_new_items()
+
+        self.loop.run_until_complete(scenario())
+
+    def test_unknown_list_is_404(self):
+        start = self.run_stream(None, path='/lists/999/events')
+        self.assertEqual(start['status'], 404)
+
+    def test_other_paths_are_404(self):
+        start = self.run_stream(None, path='/lists/1/')
+        self.assertEqual(start['status'], 404)
+
+
+@override_settings(LIVE_UPDATES=True)
+class LiveUpdatesPageTest(TestCase):
+
+    def test_last_page_advertises_events_url(self):
+        cache.clear()
+        list_ = List.objects.create()
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertContains(
+            response, f'data-events-url="/lists/{list_.id}/events?since=0"')
+
+    def test_events_start_from_the_newest_item_after_a_reorder(self):
+        cache.clear()
+        list_ = List.objects.create()
+        first = Item.objects.create(list=list_, text='first')
+        newest = Item.objects.create(list=list_, text='newest')
+        newest.move(before=first)
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertContains(response, f'/events?since={newest.id}"')
+
+    def test_events_url_outside_uvicorn_stops_reconnects(self):
+        list_ = List.objects.create()
+        response = self.client.get(f'/lists/{list_.id}/events')
+        self.assertEqual(response.status_code, 204)
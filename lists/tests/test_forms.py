@@ -1,10 +1,13 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from lists.forms import (
     EMPTY_ITEM_ERROR,
     DUPLICATE_ITEM_ERROR,
     ItemForm,
-    ExistingListItemForm
+    ExistingListItemForm,
+    save_items_in_bulk,
 )
 from lists.models import List, Item
 
@@ -42,15 +45,86 @@ class ExistingListItemFormTest(TestCase):
         self.assertFalse(form.is_valid())
         self.assertEqual(form.errors['text'], [EMPTY_ITEM_ERROR])
 
-    def test_form_validation_for_duplicate_items(self):
+    def test_form_save_reports_duplicate_items(self):
         list_ = List.objects.create()
         Item.objects.create(list=list_, text='no twins!')
         form = ExistingListItemForm(for_list=list_, data={'text': 'no twins!'})
-        self.assertFalse(form.is_valid())
+        self.assertTrue(form.is_valid())
+        self.assertIsNone(form.save())
+        self.assertEqual(form.errors['text'], [DUPLICATE_ITEM_ERROR])
+        self.assertEqual(Item.objects.count(), 1)
+
+    def test_duplicate_check_is_a_single_insert(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='no twins!')
+        form = ExistingListItemForm(for_list=list_, data={'text': 'no twins!'})
+        with CaptureQueriesContext(connection) as queries:
+            form.is_valid()
+            form.save()
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertNotIn('SELECT', statements)
+        self.assertEqual(statements.count('INSERT'), 1)
+
+    @override_settings(LISTS_LOOSE_DUPLICATES=True)
+    def test_loose_mode_ignores_case_and_whitespace(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='Buy  milk')
+        form = ExistingListItemForm(for_list=list_, data={'text': 'buy milk'})
+        form.is_valid()
+        self.assertIsNone(form.save())
         self.assertEqual(form.errors['text'], [DUPLICATE_ITEM_ERROR])
 
     def test_form_save(self):
         list_ = List.objects.create()
         form = ExistingListItemForm(for_list=list_, data={'text': 'hi'})
         new_item = form.save()
-        self.assertEqual(new_item, Item.objects.all()[0])
\ No newline at end of file
+        self.assertEqual(new_item, Item.objects.all()[0])
+
+    def test_form_save_updates_item_count(self):
+        list_ = List.objects.create()
+        ExistingListItemForm(for_list=list_, data={'text': 'hi'}).save()
+        list_.refresh_from_db()
+        self.assertEqual(list_.item_count, 1)
+
+
+class SaveItemsInBulkTest(TestCase):
+
+    def test_saves_all_texts_to_the_list(self):
+        list_ = List.objects.create()
+        created, rejected = save_items_in_bulk(list_, ['a', 'b', 'c'])
+        self.assertEqual([item.text for item in created], ['a', 'b', 'c'])
+        self.assertEqual(rejected, [])
+        self.assertEqual(
+            list(list_.item_set.values_list('text', flat=True)),
+            ['a', 'b', 'c']
+        )
+
+    def test_rejects_empty_texts(self):
+        list_ = List.objects.create()
+        created, rejected = save_items_in_bulk(list_, ['a', '  '])
+        self.assertEqual(rejected, [{'text': '  ', 'error': EMPTY_ITEM_ERROR}])
+        self.assertEqual(list_.item_set.count(), 1)
+
+    def test_rejects_duplicates_within_batch_and_list(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='old')
+        created, rejected = save_items_in_bulk(list_, ['new', 'new', 'old'])
+        self.assertEqual([item.text for item in created], ['new'])
+        self.assertEqual(rejected, [
+            {'text': 'new', 'error': DUPLICATE_ITEM_ERROR},
+            {'text': 'old', 'error': DUPLICATE_ITEM_ERROR},
+        ])
+        self.assertEqual(list_.item_set.count(), 2)
+
+    def test_updates_item_count(self):
+        list_ = List.objects.create()
+        save_items_in_bulk(list_, ['a', 'b', 'a'])
+        list_.refresh_from_db()
+        self.assertEqual(list_.item_count, 2)
+
+    def test_saves_more_texts_than_one_batch(self):
+        list_ = List.objects.create()
+        texts = [f'item {i}' for i in range(1200)]
+        created, rejected = save_items_in_bulk(list_, texts)
+        self.assertEqual(len(created), 1200)
+        self.assertEqual(list_.item_set.count(), 1200)
@@ -0,0 +1,42 @@
+import importlib
+import os
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from superlists import gunicorn_conf
+from superlists.warmup import warmup
+
+
+class GunicornConfTest(SimpleTestCase):
+
+    def load(self, **env):
+        variables = {f'GUNICORN_{name}': value for name, value in env.items()}
+        with patch.dict(os.environ, variables), \
+                patch('multiprocessing.cpu_count', return_value=4):
+            self.addCleanup(importlib.reload, gunicorn_conf)
+            return importlib.reload(gunicorn_conf)
+
+    def test_sizes_sync_workers_from_cpu_count(self):
+        conf = self.load()
+        self.assertEqual((conf.workers, conf.threads), (9, 1))
+
+    def test_gthread_uses_fewer_workers_with_threads(self):
+        conf = self.load(WORKER_CLASS='gthread')
+        self.assertEqual((conf.workers, conf.threads), (5, 4))
+
+    def test_environment_overrides_defaults(self):
+        conf = self.load(WORKERS='2', PRELOAD='True', MAX_REQUESTS='0')
+        self.assertEqual(conf.workers, 2)
+        self.assertTrue(conf.preload_app)
+        self.assertEqual(conf.max_requests, 0)
+
+
+class WarmupTest(SimpleTestCase):
+
+    def test_compiles_templates_and_reports_timings(self):
+        with self.assertLogs('superlists.warmup', 'INFO') as logs:
+            timings = warmup(connect=False)
+        self.assertEqual(
+            list(timings), ['templates', 'forms', 'urls', 'total'])
+        self.assertIn(f"warmup took {timings['total']}ms", logs.output[0])
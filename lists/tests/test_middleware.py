@@ -0,0 +1,123 @@
+import json
+import re
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.backends.utils import CursorWrapper
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, modify_settings, override_settings,
+)
+
+from lists.models import Item, List
+from superlists import routers
+from superlists.middleware import PIN_COOKIE, ReadReplicaMiddleware
+
+
+@override_settings(READ_REPLICA_PIN_SECONDS=7)
+class ReadReplicaMiddlewareTest(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.replica_during_view = None
+        self.middleware = ReadReplicaMiddleware(self.view)
+
+    def view(self, request):
+        with patch.dict(connections.databases, {'replica': {}}):
+            self.replica_during_view = routers.ReplicaRouter().db_for_read(List)
+        return HttpResponse()
+
+    def test_routes_GET_reads_to_replica(self):
+        self.middleware(self.factory.get('/'))
+        self.assertEqual(self.replica_during_view, 'replica')
+
+    def test_keeps_POST_on_primary_and_pins_client(self):
+        response = self.middleware(self.factory.post('/lists/new'))
+        self.assertIsNone(self.replica_during_view)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 7)
+
+    def test_pinned_client_reads_from_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.middleware(request)
+        self.assertIsNone(self.replica_during_view)
+
+    def test_stops_routing_to_replica_after_the_request(self):
+        self.middleware(self.factory.get('/'))
+        with patch.dict(connections.databases, {'replica': {}}):
+            self.assertIsNone(routers.ReplicaRouter().db_for_read(List))
+
+
+class ReplicaRouterTest(SimpleTestCase):
+
+    def test_reads_go_to_default_when_no_replica_is_configured(self):
+        routers.set_read_replica(True)
+        self.addCleanup(routers.set_read_replica, False)
+        self.assertIsNone(routers.ReplicaRouter().db_for_read(List))
+
+    def test_writes_through_replica_objects_go_to_default(self):
+        list_ = List()
+        list_._state.db = 'replica'
+        self.assertEqual(
+            routers.ReplicaRouter().db_for_write(List, instance=list_),
+            'default'
+        )
+
+    def test_never_migrates_the_replica(self):
+        self.assertFalse(routers.ReplicaRouter().allow_migrate('replica', 'lists'))
+
+
+@modify_settings(MIDDLEWARE={
+    'prepend': 'superlists.middleware.ServerTimingMiddleware',
+})
+@override_settings(TEMPLATES=[
+    dict(settings.TEMPLATES[0], BACKEND='superlists.timing.TimedDjangoTemplates'),
+])
+class ServerTimingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def get_metrics(self, response):
+        return {
+            name: params
+            for name, params in re.findall(
+                r'(\w+);(dur=[\d.]+(?:;desc="[^"]*")?)',
+                response['Server-Timing']
+            )
+        }
+
+    def test_reports_each_phase_of_a_list_page(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='itemey')
+        with self.assertLogs('superlists.timing', 'INFO') as logs:
+            response = self.client.get(f'/lists/{list_.id}/')
+        metrics = self.get_metrics(response)
+        self.assertEqual(
+            set(metrics), {'resolve', 'view', 'db', 'render', 'total'})
+        self.assertIn('desc="3 queries"', metrics['db'])
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(
+            set(line['ms']), {'resolve', 'view', 'db', 'render', 'total'})
+
+    def test_leaves_django_classes_alone(self):
+        list_ = List.objects.create()
+        with patch.object(CursorWrapper, 'execute', autospec=True,
+                          side_effect=CursorWrapper.execute) as execute:
+            with self.assertLogs('superlists.timing', 'INFO') as logs:
+                self.client.get(f'/lists/{list_.id}/')
+            self.assertIs(CursorWrapper.execute, execute)
+        self.assertTrue(execute.called)
+        self.assertEqual(json.loads(logs.records[0].getMessage())['queries'], 3)
+
+    def test_logs_a_structured_line(self):
+        list_ = List.objects.create()
+        with self.assertLogs('superlists.timing', 'INFO') as logs:
+            self.client.get(f'/lists/{list_.id}/')
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['path'], f'/lists/{list_.id}/')
+        self.assertEqual(line['status'], 200)
+        self.assertEqual(line['queries'], 3)
+        self.assertGreater(line['ms']['render'], 0)
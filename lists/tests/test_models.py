@@ -1,6 +1,14 @@
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
 from django.test import TestCase
-from lists.models import Item, List
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from lists.models import ArchivedList, Item, List
+from lists.search import search_items
 
 
 class ListModelTest(TestCase):
@@ -9,8 +17,188 @@ class ListModelTest(TestCase):
         list_ = List.objects.create()
         self.assertEqual(list_.get_absolute_url(), f'/lists/{list_.id}/')
 
+    def test_saving_and_deleting_items_bumps_version(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text='bla')
+        list_.refresh_from_db()
+        self.assertEqual(list_.version, 1)
+        item.delete()
+        list_.refresh_from_db()
+        self.assertEqual(list_.version, 2)
 
-class ListModelTest(TestCase):
+    def test_item_count_follows_saves_and_deletes(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text='one')
+        Item.objects.create(list=list_, text='two')
+        item.text = 'renamed'
+        item.save()
+        list_.refresh_from_db()
+        self.assertEqual(list_.item_count, 2)
+        item.delete()
+        list_.refresh_from_db()
+        self.assertEqual(list_.item_count, 1)
+
+    def test_item_count_never_goes_below_zero(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text='one')
+        List.objects.update(item_count=0)
+        item.delete()
+        list_.refresh_from_db()
+        self.assertEqual(list_.item_count, 0)
+
+    def test_moving_an_item_moves_its_count(self):
+        list_, other = List.objects.create(), List.objects.create()
+        item = Item.objects.create(list=list_, text='one')
+        item = Item.objects.get(id=item.id)
+        item.list = other
+        item.save()
+        item.save()
+        self.assertEqual(
+            list(List.objects.order_by('id').values_list('item_count', flat=True)),
+            [0, 1]
+        )
+
+    def test_iter_items_walks_every_chunk_in_order(self):
+        list_ = List.objects.create()
+        other_list = List.objects.create()
+        items = [Item.objects.create(list=list_, text=f'item {i}')
+                 for i in range(5)]
+        Item.objects.create(list=other_list, text='not mine')
+        self.assertEqual(
+            list(list_.iter_items('text', chunk_size=2)),
+            [(item.id, item.text) for item in items]
+        )
+
+    def test_archive_and_unarchive_round_trip_items_with_their_ids(self):
+        list_ = List.objects.create()
+        items = [Item.objects.create(list=list_, text=text) for text in ('a', 'b')]
+        other = Item.objects.create(list=List.objects.create(), text='a')
+
+        self.assertTrue(list_.archive(timezone.now()))
+        self.assertEqual(list(Item.objects.all()), [other])
+
+        List.objects.get(id=list_.id).unarchive()
+        self.assertEqual(list(list_.item_set.all()), items)
+        self.assertEqual(list_.item_set.first().text_hash, items[0].text_hash)
+        self.assertFalse(ArchivedList.objects.exists())
+        self.assertFalse(List.objects.get(id=list_.id).archived)
+        self.assertEqual(search_items('b', limit=10), [items[1]])
+
+    def test_unarchive_drops_archived_items_a_racing_write_duplicated(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='a')
+        Item.objects.create(list=list_, text='b')
+        list_.archive(timezone.now())
+        # a write that read the list before it was archived
+        racer = Item.objects.create(list=list_, text='a')
+
+        List.objects.get(id=list_.id).unarchive()
+        self.assertEqual(
+            sorted(list_.item_set.values_list('text', flat=True)), ['a', 'b'])
+        self.assertIn(racer, list_.item_set.all())
+        self.assertEqual(List.objects.get(id=list_.id).item_count, 2)
+
+    def test_archive_leaves_items_added_after_it_read_them(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='a')
+        real_pack = ArchivedList.pack
+
+        def pack_then_race(rows):
+            Item.objects.create(list=list_, text='late')
+            return real_pack(rows)
+
+        with patch.object(ArchivedList, 'pack', pack_then_race):
+            list_.archive(timezone.now())
+        self.assertEqual(
+            list(list_.item_set.values_list('text', flat=True)), ['late'])
+
+    def test_does_not_archive_a_list_updated_since(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='a')
+        self.assertFalse(list_.archive(timezone.now() - timedelta(days=1)))
+        self.assertEqual(Item.objects.count(), 1)
+        self.assertFalse(ArchivedList.objects.exists())
+
+
+class ItemPositionTest(TestCase):
+
+    def setUp(self):
+        self.list_ = List.objects.create()
+        self.items = [
+            Item.objects.create(list=self.list_, text=text) for text in 'abcd']
+
+    def texts(self):
+        return ''.join(self.list_.item_set.values_list('text', flat=True))
+
+    @skipUnless(connection.vendor == 'sqlite', 'reads an SQLite query plan')
+    def test_iter_items_chunks_are_index_range_scans(self):
+        with CaptureQueriesContext(connection) as queries:
+            list(self.list_.iter_items('text', chunk_size=2))
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries[1]['sql'])
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('position>?', plan)
+
+    def test_new_items_are_appended(self):
+        self.assertEqual(
+            [item.position for item in self.items], ['a0', 'a1', 'a2', 'a3'])
+        self.assertEqual(List.objects.get(id=self.list_.id).last_position, 'a3')
+
+    def test_move_after_rewrites_only_that_item(self):
+        a, b, c, d = self.items
+        # the neighbour lookup, then one UPDATE each for the item and the list
+        with self.assertNumQueries(5):
+            a.move(after=c)
+        self.assertEqual(self.texts(), 'bcad')
+        self.assertEqual(
+            list(Item.objects.exclude(id=a.id).values_list('position', flat=True)),
+            ['a1', 'a2', 'a3'])
+
+    def test_move_before_and_to_the_top(self):
+        a, b, c, d = self.items
+        d.move(before=b)
+        self.assertEqual(self.texts(), 'adbc')
+        c.move()
+        self.assertEqual(self.texts(), 'cadb')
+
+    def test_move_to_the_end_advances_last_position(self):
+        a, b, c, d = self.items
+        a.move(after=d)
+        self.assertEqual(self.texts(), 'bcda')
+        self.assertEqual(List.objects.get(id=self.list_.id).last_position, a.position)
+        Item.objects.create(list=List.objects.get(id=self.list_.id), text='e')
+        self.assertEqual(self.texts(), 'bcdae')
+
+    def test_move_between_tied_positions_rebalances(self):
+        a, b, c, d = self.items
+        Item.objects.filter(id__in=[b.id, c.id]).update(position='a1')
+        d.move(after=b)
+        self.assertEqual(self.texts(), 'abdc')
+        self.assertEqual(
+            list(self.list_.item_set.values_list('position', flat=True)),
+            ['a0', 'a1', 'a1V', 'a2'])
+
+    def test_long_keys_flag_the_list_for_rebalancing(self):
+        a, b, c, d = self.items
+        Item.objects.filter(id=b.id).update(position='a0' + '0' * 40 + '1')
+        d.move(after=a)
+        self.assertGreater(len(d.position), 40)
+        self.assertTrue(List.objects.get(id=self.list_.id).needs_rebalance)
+        List.objects.get(id=self.list_.id).rebalance()
+        self.assertEqual(
+            list(self.list_.item_set.values_list('text', 'position')),
+            [('a', 'a0'), ('d', 'a1'), ('b', 'a2'), ('c', 'a3')])
+        self.assertFalse(List.objects.get(id=self.list_.id).needs_rebalance)
+
+    def test_iter_items_follows_positions(self):
+        a, b, c, d = self.items
+        b.move(after=d)
+        self.assertEqual(
+            [text for _, text in self.list_.iter_items('text', chunk_size=2)],
+            ['a', 'c', 'd', 'b'])
+
+
+class ItemModelTest(TestCase):
 
     def test_default_text(self):
         item = Item()
@@ -38,6 +226,17 @@ class ListModelTest(TestCase):
             item.full_clean()
             # item.save()
 
+    def test_duplicate_items_are_rejected_by_the_database(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='bla')
+        with self.assertRaises(IntegrityError):
+            Item.objects.create(list=list_, text='bla')
+
+    def test_text_hash_is_fixed_width(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text='bla' * 1000)
+        self.assertEqual(len(item.text_hash), 64)
+
     def test_CAN_save_same_item_to_different_lists(self):
         list1 = List.objects.create()
         list2 = List.objects.create()
@@ -0,0 +1,38 @@
+import random
+
+from django.test import SimpleTestCase
+
+from lists.positions import key_between, keys_after
+
+
+class KeyBetweenTest(SimpleTestCase):
+
+    def test_first_key_and_appends(self):
+        self.assertEqual(key_between(None, None), 'a0')
+        self.assertEqual(keys_after(None, 3), ['a0', 'a1', 'a2'])
+        self.assertEqual(key_between('az', None), 'b00')
+
+    def test_prepends_and_inserts(self):
+        self.assertEqual(key_between(None, 'a0'), 'Zz')
+        self.assertEqual(key_between('a0', 'a1'), 'a0V')
+        self.assertEqual(key_between('a0', 'a0V'), 'a0G')
+
+    def test_keys_stay_ordered_under_random_inserts(self):
+        rng = random.Random(0)
+        keys = [key_between(None, None)]
+        for _ in range(2000):
+            i = rng.randint(0, len(keys))
+            low = keys[i - 1] if i else None
+            high = keys[i] if i < len(keys) else None
+            keys.insert(i, key_between(low, high))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_appends_stay_short(self):
+        self.assertEqual(len(keys_after(None, 100000)[-1]), 4)
+
+    def test_rejects_out_of_order_bounds(self):
+        with self.assertRaises(ValueError):
+            key_between('a1', 'a0')
+        with self.assertRaises(ValueError):
+            key_between('a1', 'a1')
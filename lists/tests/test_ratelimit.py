@@ -0,0 +1,101 @@
+import tempfile
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from lists import ratelimit
+from lists.models import Item, List
+
+
+class TakeTest(TestCase):
+
+    def setUp(self):
+        ratelimit._cache().clear()
+
+    def test_allows_a_burst_then_refills_at_the_rate(self):
+        waits = [ratelimit.take('bucket', 2, 3, now=100) for _ in range(4)]
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertAlmostEqual(waits[3], 0.5)
+        self.assertEqual(ratelimit.take('bucket', 2, 3, now=100.5), 0)
+        self.assertGreater(ratelimit.take('bucket', 2, 3, now=100.5), 0)
+
+
+@override_settings(
+    RATE_LIMIT_ENABLED=True,
+    RATE_LIMITS={'ip': (1, 2), 'list': (1, 3)},
+    WRITE_CONCURRENCY_LIMIT=8,
+)
+class LimitWritesTest(TestCase):
+
+    def setUp(self):
+        ratelimit._cache().clear()
+        slots = tempfile.TemporaryDirectory()
+        self.addCleanup(slots.cleanup)
+        slots_dir = override_settings(WRITE_SLOTS_DIR=slots.name)
+        slots_dir.enable()
+        self.addCleanup(slots_dir.disable)
+
+    def post_new_list(self, ip='10.0.0.1'):
+        return self.client.post(
+            '/lists/new', data={'text': 'item'}, HTTP_X_REAL_IP=ip)
+
+    def test_limits_each_client_ip(self):
+        self.assertEqual(self.post_new_list().status_code, 302)
+        self.assertEqual(self.post_new_list().status_code, 302)
+        response = self.post_new_list()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(List.objects.count(), 2)
+        self.assertEqual(self.post_new_list(ip='10.0.0.2').status_code, 302)
+
+    def test_limits_each_list_across_clients(self):
+        list_ = List.objects.create()
+        statuses = [
+            self.client.post(
+                f'/lists/{list_.id}/', data={'text': f'item {n}'},
+                HTTP_X_REAL_IP=f'10.0.0.{n}',
+            ).status_code
+            for n in range(4)
+        ]
+        self.assertEqual(statuses, [302, 302, 302, 429])
+        self.assertEqual(Item.objects.count(), 3)
+
+    def test_ajax_writes_get_json_errors(self):
+        list_ = List.objects.create()
+        for n in range(3):
+            response = self.client.post(
+                f'/lists/{list_.id}/items', data={'text': f'item {n}'},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Too many requests', response.json()['errors'][0])
+
+    def test_state_lives_in_the_shared_cache(self):
+        self.post_new_list()
+        self.assertIsNotNone(ratelimit._cache().get('ratelimit:ip:10.0.0.1'))
+        self.assertIsNone(cache.get('ratelimit:ip:10.0.0.1'))
+
+    def test_reads_are_not_limited(self):
+        list_ = List.objects.create()
+        for _ in range(5):
+            response = self.client.get(f'/lists/{list_.id}/')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(WRITE_CONCURRENCY_LIMIT=1)
+    def test_sheds_writes_over_the_concurrency_limit(self):
+        # another worker's write, holding the only slot
+        slot = ratelimit._enter()
+        self.addCleanup(ratelimit._leave, slot)
+        response = self.post_new_list()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(List.objects.count(), 0)
+
+    @override_settings(WRITE_CONCURRENCY_LIMIT=1)
+    def test_releases_the_concurrency_slot_when_the_view_fails(self):
+        with patch('lists.views.ItemForm', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post_new_list()
+        slot = ratelimit._enter()
+        self.assertIsNotNone(slot)
+        ratelimit._leave(slot)
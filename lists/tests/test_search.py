@@ -0,0 +1,95 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from lists.models import Item, List
+from lists.search import search_items
+
+
+class SearchItemsTest(TestCase):
+
+    def setUp(self):
+        self.list_ = List.objects.create()
+
+    def add(self, text):
+        return Item.objects.create(list=self.list_, text=text)
+
+    def test_finds_items_by_prefix(self):
+        milk = self.add('Buy milk')
+        self.add('Walk the dog')
+        self.assertEqual(search_items('mil', limit=10), [milk])
+
+    def test_requires_every_term(self):
+        self.add('Buy milk')
+        oat_milk = self.add('Buy oat milk')
+        self.assertEqual(search_items('oat milk', limit=10), [oat_milk])
+
+    def test_ranks_closer_matches_first(self):
+        long = self.add('milk ' + 'and lots of other words ' * 10)
+        short = self.add('milk')
+        self.assertEqual(search_items('milk', limit=10), [short, long])
+
+    def test_follows_edits_and_deletes(self):
+        item = self.add('Buy milk')
+        item.text = 'Buy bread'
+        item.save()
+        self.assertEqual(search_items('milk', limit=10), [])
+        self.assertEqual(search_items('bread', limit=10), [item])
+        item.delete()
+        self.assertEqual(search_items('bread', limit=10), [])
+
+    def test_indexes_bulk_inserts(self):
+        Item.objects.bulk_create([Item(list=self.list_, text='Buy milk')])
+        self.assertEqual(len(search_items('milk', limit=10)), 1)
+
+    def test_ignores_query_syntax(self):
+        item = self.add('Buy "milk"')
+        self.assertEqual(search_items('"milk* (', limit=10), [item])
+        self.assertEqual(search_items('*', limit=10), [])
+
+    def test_pages_through_results(self):
+        items = [self.add(f'milk {i}') for i in range(3)]
+        self.assertEqual(search_items('milk', limit=2, offset=2), items[2:])
+
+
+class SearchViewTest(TestCase):
+
+    def test_links_results_to_their_lists(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='Buy milk')
+        response = self.client.get('/lists/search', {'q': 'milk'})
+        self.assertTemplateUsed(response, 'search.html')
+        self.assertContains(response, f'<a href="/lists/{list_.id}/">Buy milk</a>')
+
+    def test_paginates_results(self):
+        list_ = List.objects.create()
+        for i in range(3):
+            Item.objects.create(list=list_, text=f'milk {i}')
+        with patch('lists.views.SEARCH_RESULTS_PER_PAGE', 2):
+            response = self.client.get('/lists/search', {'q': 'milk'})
+            self.assertTrue(response.context['has_next'])
+            response = self.client.get(
+                '/lists/search', {'q': 'milk', 'page': 2})
+            self.assertEqual(len(response.context['results']), 1)
+            self.assertFalse(response.context['has_next'])
+
+
+class RebuildSearchIndexTest(TestCase):
+
+    def test_reindexes_existing_items_in_batches(self):
+        list_ = List.objects.create()
+        for i in range(5):
+            Item.objects.create(list=list_, text=f'milk {i}')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO lists_item_fts (lists_item_fts) VALUES ('delete-all')")
+        self.assertEqual(search_items('milk', limit=10), [])
+
+        out = StringIO()
+        call_command('rebuildsearchindex', batch_size=2, stdout=out)
+
+        self.assertEqual(len(search_items('milk', limit=10)), 5)
+        self.assertIn('Indexed 5 items.', out.getvalue())
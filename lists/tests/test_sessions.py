@@ -0,0 +1,44 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from lists.models import Item, List
+
+
+class AnonymousSessionTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_read_only_pages_do_not_create_sessions(self):
+        list_ = List.objects.create()
+        for url in ('/', f'/lists/{list_.id}/'):
+            response = self.client.get(url)
+            self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_view_list_does_not_load_an_existing_session(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='itemey')
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store.create()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+
+        # validators, list, items: nothing from django_session
+        with self.assertNumQueries(3):
+            self.client.get(f'/lists/{list_.id}/')
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class CachedSessionTest(TestCase):
+
+    def test_loading_a_cached_session_skips_the_database(self):
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        store = SessionStore()
+        store['_auth_user_id'] = 'a@b.com'
+        store.create()
+        with self.assertNumQueries(0):
+            loaded = SessionStore(store.session_key).load()
+        self.assertEqual(loaded['_auth_user_id'], 'a@b.com')
@@ -0,0 +1,35 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+from django.utils.functional import empty
+
+
+class CompressedManifestStorageTest(SimpleTestCase):
+
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+        settings_override = override_settings(STATIC_ROOT=self.static_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        staticfiles_storage._wrapped = empty
+        self.addCleanup(setattr, staticfiles_storage, '_wrapped', empty)
+
+    def test_serves_unhashed_names_before_collectstatic(self):
+        self.assertEqual(static('list.js'), '/static/list.js')
+
+    def test_collectstatic_writes_hashed_names_and_gzip_siblings(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        staticfiles_storage._wrapped = empty
+
+        url = static('jquery-3.2.1.min.js')
+        self.assertRegex(url, r'^/static/jquery-3\.2\.1\.min\.[0-9a-f]{12}\.js$')
+        path = os.path.join(self.static_root, url[len('/static/'):])
+        with open(path, 'rb') as original, gzip.open(path + '.gz') as compressed:
+            self.assertEqual(compressed.read(), original.read())
@@ -1,9 +1,15 @@
+import json
 import time
-from unittest import skip
+from unittest import skip, skipUnless
+from unittest.mock import patch
+from django.core.cache import cache
 from django.core.urlresolvers import resolve
+from django.db import connection
 from django.http import HttpRequest
 from django.template.loader import render_to_string
-from django.test import TestCase
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.utils.html import escape
 
 from lists.forms import (
@@ -16,6 +22,9 @@ from lists.views import home_page
 
 class HomePageTest(TestCase):
 
+    def setUp(self):
+        cache.clear()
+
     def test_uses_home_template(self):
         response = self.client.get('/')
         self.assertTemplateUsed(response, 'home.html')
@@ -24,9 +33,61 @@ class HomePageTest(TestCase):
         response = self.client.get('/')
         self.assertIsInstance(response.context['form'], ItemForm)
 
+    def test_page_has_no_csrf_token_or_cookie(self):
+        response = self.client.get('/')
+        self.assertContains(
+            response, 'name="csrfmiddlewaretoken" value=""', html=False)
+        self.assertNotIn('csrftoken', response.cookies)
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_page_is_cached(self):
+        first = self.client.get('/')
+        second = self.client.get('/')
+        self.assertTemplateNotUsed(second, 'home.html')
+        self.assertEqual(second.content, first.content)
+        self.assertIn('max-age=60', second['Cache-Control'])
+
+
+class CsrfTokenTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client(enforce_csrf_checks=True)
+
+    def test_returns_token_and_sets_cookie(self):
+        response = self.client.get('/lists/csrf')
+        self.assertEqual(len(response.json()['token']), 64)
+        self.assertIn('csrftoken', response.cookies)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_fetched_token_lets_new_list_POST_through(self):
+        self.client.get('/')
+        token = self.client.get('/lists/csrf').json()['token']
+        response = self.client.post(
+            '/lists/new', data={'text': 'A new item', 'csrfmiddlewaretoken': token})
+        self.assertRedirects(response, f'/lists/{List.objects.get().id}/')
+
+    def test_POST_without_token_gets_the_form_back_with_one(self):
+        response = self.client.post(
+            '/lists/new', data={'text': 'A new item', 'csrfmiddlewaretoken': ''})
+        self.assertEqual(response.status_code, 403)
+        self.assertTemplateUsed(response, 'home.html')
+        self.assertContains(response, 'value="A new item"', status_code=403)
+        self.assertIn('csrftoken', response.cookies)
+        self.assertEqual(Item.objects.count(), 0)
+
+    def test_other_views_keep_the_default_failure_page(self):
+        list_ = List.objects.create()
+        response = self.client.post(f'/lists/{list_.id}/', data={'text': 'x'})
+        self.assertEqual(response.status_code, 403)
+        self.assertTemplateNotUsed(response, 'home.html')
+
 
 class ListViewTest(TestCase):
 
+    def setUp(self):
+        cache.clear()
+
     def test_uses_list_template(self):
         list_ = List.objects.create()
         response = self.client.get(f'/lists/{list_.id}/')
@@ -53,6 +114,16 @@ class ListViewTest(TestCase):
         response = self.client.get(f'/lists/{correct_list.id}/')
         self.assertEqual(response.context['list'], correct_list)
 
+    def test_unarchives_an_archived_list(self):
+        list_ = List.objects.create()
+        Item.objects.create(text='itemey 1', list=list_)
+        list_.archive(timezone.now())
+
+        response = self.client.get(f'/lists/{list_.id}/')
+
+        self.assertContains(response, 'itemey 1')
+        self.assertFalse(List.objects.get(id=list_.id).archived)
+        self.assertEqual(Item.objects.count(), 1)
 
     def test_can_save_a_POST_request_to_an_existing_list(self):
         other_list = List.objects.create()
@@ -117,6 +188,376 @@ class ListViewTest(TestCase):
         self.assertIsInstance(response.context['form'], ItemForm)
         self.assertContains(response, 'name="text"')
 
+    @patch('lists.views.ITEMS_PER_PAGE', 2)
+    def test_paginates_items_with_a_cursor(self):
+        list_ = List.objects.create()
+        items = [Item.objects.create(list=list_, text=f'item {i}')
+                 for i in range(5)]
+
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertEqual(response.context['items'], items[:2])
+        self.assertEqual(response.context['next_after'], items[1].id)
+        self.assertContains(
+            response, f'?after={items[1].id}&amp;start=2">Next</a>')
+
+        response = self.client.get(f'/lists/{list_.id}/?after={items[3].id}')
+        self.assertEqual(response.context['items'], items[4:])
+        self.assertIsNone(response.context['next_after'])
+
+    @skipUnless(connection.vendor == 'sqlite', 'reads an SQLite query plan')
+    @patch('lists.views.ITEMS_PER_PAGE', 2)
+    def test_later_pages_are_index_range_scans(self):
+        cache.clear()
+        list_ = List.objects.create()
+        items = [Item.objects.create(list=list_, text=f'item {i}')
+                 for i in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/lists/{list_.id}/?after={items[1].id}&start=2')
+        item_queries = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'FROM "lists_item"' in query['sql']
+        ]
+        self.assertFalse([sql for sql in item_queries if 'COUNT(' in sql])
+        page_query = [sql for sql in item_queries if 'LIMIT 3' in sql][0]
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + page_query)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('position>?', plan)
+
+    @patch('lists.views.ITEMS_PER_PAGE', 2)
+    def test_numbering_continues_across_pages(self):
+        list_ = List.objects.create()
+        items = [Item.objects.create(list=list_, text=f'item {i}')
+                 for i in range(3)]
+        response = self.client.get(
+            f'/lists/{list_.id}/?after={items[1].id}&start=2')
+        self.assertContains(response, '3: item 2')
+
+    @patch('lists.views.ITEMS_PER_PAGE', 2)
+    def test_pages_and_numbers_follow_item_positions(self):
+        list_ = List.objects.create()
+        items = [Item.objects.create(list=list_, text=f'item {i}')
+                 for i in range(4)]
+        items[0].move(after=items[3])
+
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertEqual(response.context['items'], items[1:3])
+        response = self.client.get(
+            f'/lists/{list_.id}/?after={items[2].id}&start=2')
+        self.assertEqual(response.context['items'], [items[3], items[0]])
+        self.assertContains(response, '4: item 0')
+
+    @patch('lists.views.ITEMS_PER_PAGE', 2)
+    def test_invalid_POST_on_a_later_page_stays_on_that_page(self):
+        list_ = List.objects.create()
+        items = [Item.objects.create(list=list_, text=f'item {i}')
+                 for i in range(3)]
+        response = self.client.post(
+            f'/lists/{list_.id}/?after={items[1].id}&start=2',
+            data={'text': ''}
+        )
+        self.assertEqual(response.context['items'], items[2:])
+        self.assertContains(
+            response,
+            f'action="/lists/{list_.id}/?after={items[1].id}&amp;start=2"')
+        self.assertContains(response, '3: item 2')
+
+    def test_serves_item_table_from_cache_until_list_changes(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='itemey 1')
+
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertEqual(response['X-Fragment-Cache'], 'miss')
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertEqual(response['X-Fragment-Cache'], 'hit')
+        self.assertContains(response, '1: itemey 1')
+
+        Item.objects.create(list=list_, text='itemey 2')
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertEqual(response['X-Fragment-Cache'], 'miss')
+        self.assertContains(response, '2: itemey 2')
+
+    def test_returns_304_when_etag_matches(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='itemey 1')
+        etag = self.client.get(f'/lists/{list_.id}/')['ETag']
+
+        response = self.client.get(
+            f'/lists/{list_.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Item.objects.create(list=list_, text='itemey 2')
+        response = self.client.get(
+            f'/lists/{list_.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_returns_304_when_not_modified_since(self):
+        list_ = List.objects.create()
+        last_modified = self.client.get(f'/lists/{list_.id}/')['Last-Modified']
+        response = self.client.get(
+            f'/lists/{list_.id}/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_differs_between_pages(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text='itemey 1')
+        first = self.client.get(f'/lists/{list_.id}/')['ETag']
+        second = self.client.get(f'/lists/{list_.id}/?after={item.id}')['ETag']
+        self.assertNotEqual(first, second)
+
+    def test_conditional_check_does_not_load_items(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='itemey 1')
+        etag = self.client.get(f'/lists/{list_.id}/')['ETag']
+        with self.assertNumQueries(1):
+            self.client.get(f'/lists/{list_.id}/', HTTP_IF_NONE_MATCH=etag)
+
+    def test_ignores_malformed_cursor(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='itemey')
+        response = self.client.get(f'/lists/{list_.id}/?after=nope')
+        self.assertContains(response, '1: itemey')
+
+
+class AddItemTest(TestCase):
+
+    def test_saves_item_and_returns_only_its_row(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='first')
+        response = self.client.post(
+            f'/lists/{list_.id}/items', data={'text': 'second'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.json(),
+            {'row': f'<tr data-item-id="{list_.item_set.last().id}"><td>2: second</td></tr>\n'},
+        )
+        self.assertEqual(list_.item_set.count(), 2)
+
+    def test_returns_form_errors(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='first')
+        response = self.client.post(
+            f'/lists/{list_.id}/items', data={'text': 'first'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'errors': [DUPLICATE_ITEM_ERROR]})
+
+    def test_returns_empty_item_error(self):
+        list_ = List.objects.create()
+        response = self.client.post(
+            f'/lists/{list_.id}/items', data={'text': ''})
+        self.assertEqual(response.json(), {'errors': [EMPTY_ITEM_ERROR]})
+
+    def test_list_page_advertises_add_url_only_on_last_page(self):
+        cache.clear()
+        list_ = List.objects.create()
+        items = [Item.objects.create(list=list_, text=f'item {i}')
+                 for i in range(3)]
+        add_url = f'data-add-url="/lists/{list_.id}/items"'
+        with patch('lists.views.ITEMS_PER_PAGE', 2):
+            response = self.client.get(f'/lists/{list_.id}/')
+            self.assertNotContains(response, add_url)
+            response = self.client.get(
+                f'/lists/{list_.id}/?after={items[1].id}')
+            self.assertContains(response, add_url)
+
+
+class MoveItemTest(TestCase):
+
+    def setUp(self):
+        self.list_ = List.objects.create()
+        self.items = [Item.objects.create(list=self.list_, text=text)
+                      for text in ('a', 'b', 'c')]
+
+    def move(self, **data):
+        return self.client.post(f'/lists/{self.list_.id}/items/move', data=data)
+
+    def texts(self):
+        return ''.join(self.list_.item_set.values_list('text', flat=True))
+
+    def test_moves_item_after_another(self):
+        a, b, c = self.items
+        response = self.move(item=a.id, after=b.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'position': 'a1V'})
+        self.assertEqual(self.texts(), 'bac')
+
+    def test_moves_item_before_another(self):
+        a, b, c = self.items
+        self.move(item=c.id, before=a.id)
+        self.assertEqual(self.texts(), 'cab')
+
+    def test_move_invalidates_cached_table(self):
+        a, b, c = self.items
+        cache.clear()
+        self.client.get(f'/lists/{self.list_.id}/')
+        self.move(item=c.id, before=a.id)
+        response = self.client.get(f'/lists/{self.list_.id}/')
+        self.assertContains(response, '1: c')
+
+    def test_rejects_items_from_other_lists(self):
+        other = Item.objects.create(list=List.objects.create(), text='x')
+        response = self.move(item=other.id, after=self.items[0].id)
+        self.assertEqual(response.status_code, 400)
+        response = self.move(item=self.items[0].id, after=other.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.texts(), 'abc')
+
+    def test_rejects_moving_next_to_itself(self):
+        response = self.move(item=self.items[0].id, after=self.items[0].id)
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkAddItemsTest(TestCase):
+
+    def test_adds_all_texts_to_the_list(self):
+        list_ = List.objects.create()
+        response = self.client.post(
+            f'/lists/{list_.id}/items/bulk',
+            data={'text': ['one', 'two']}
+        )
+        self.assertEqual(response.json()['created'], ['one', 'two'])
+        self.assertEqual(list_.item_set.count(), 2)
+
+    def test_reports_rejected_texts(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='one')
+        response = self.client.post(
+            f'/lists/{list_.id}/items/bulk',
+            data={'text': ['one', '']}
+        )
+        self.assertEqual(response.json()['rejected'], [
+            {'text': '', 'error': EMPTY_ITEM_ERROR},
+            {'text': 'one', 'error': DUPLICATE_ITEM_ERROR},
+        ])
+
+    def test_imports_more_texts_than_a_form_post_allows_as_json(self):
+        list_ = List.objects.create()
+        texts = [f'item {i}' for i in range(1200)]
+        response = self.client.post(
+            f'/lists/{list_.id}/items/bulk',
+            data=json.dumps({'text': texts}),
+            content_type='application/json',
+        )
+        self.assertEqual(len(response.json()['created']), 1200)
+        self.assertEqual(list_.item_set.count(), 1200)
+
+    def test_accepts_one_text_per_line(self):
+        list_ = List.objects.create()
+        lines = '\n'.join(f'item {i}' for i in range(1001))
+        response = self.client.post(
+            f'/lists/{list_.id}/items/bulk', data=lines, content_type='text/plain')
+        self.assertEqual(len(response.json()['created']), 1001)
+
+    def test_rejects_malformed_json(self):
+        list_ = List.objects.create()
+        response = self.client.post(
+            f'/lists/{list_.id}/items/bulk', data='{"text": [1]}',
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @patch('lists.views.BULK_ADD_MAX_ITEMS', 2)
+    def test_rejects_batches_over_the_limit(self):
+        list_ = List.objects.create()
+        response = self.client.post(
+            f'/lists/{list_.id}/items/bulk', data={'text': ['a', 'b', 'c']})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(list_.item_set.exists())
+
+    def test_only_accepts_POST(self):
+        list_ = List.objects.create()
+        response = self.client.get(f'/lists/{list_.id}/items/bulk')
+        self.assertEqual(response.status_code, 405)
+
+
+class ListItemsTest(TestCase):
+
+    def test_returns_items_added_since_an_id(self):
+        list_ = List.objects.create()
+        first = Item.objects.create(list=list_, text='one')
+        second = Item.objects.create(list=list_, text='two')
+        response = self.client.get(f'/lists/{list_.id}/items.json?since={first.id}')
+        data = response.json()
+        self.assertEqual(data['items'], [
+            {'id': second.id, 'text': 'two', 'position': second.position},
+        ])
+        self.assertEqual(data['since'], second.id)
+        self.assertEqual(data['item_count'], 2)
+        self.assertFalse(data['more'])
+
+    def test_since_is_unchanged_when_nothing_is_new(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text='one')
+        response = self.client.get(f'/lists/{list_.id}/items.json?since={item.id}')
+        self.assertEqual(response.json()['items'], [])
+        self.assertEqual(response.json()['since'], item.id)
+
+    def test_compact_projection_sends_arrays(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text='one')
+        response = self.client.get(
+            f'/lists/{list_.id}/items.json?fields=text&compact=1')
+        self.assertEqual(response.json()['fields'], ['id', 'text'])
+        self.assertEqual(response.json()['items'], [[item.id, 'one']])
+        self.assertNotIn(b' ', response.content)
+
+    def test_rejects_unknown_fields(self):
+        list_ = List.objects.create()
+        response = self.client.get(f'/lists/{list_.id}/items.json?fields=text_hash')
+        self.assertEqual(response.status_code, 400)
+
+    def test_pages_through_long_lists(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='one')
+        last = Item.objects.create(list=list_, text='two')
+        with patch('lists.views.SYNC_PAGE_SIZE', 1):
+            data = self.client.get(f'/lists/{list_.id}/items.json').json()
+            self.assertTrue(data['more'])
+            data = self.client.get(
+                f'/lists/{list_.id}/items.json?since={data["since"]}').json()
+        self.assertEqual([item['id'] for item in data['items']], [last.id])
+        self.assertFalse(data['more'])
+
+    def test_does_not_build_item_instances(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='one')
+        with patch.object(Item, '__init__') as init:
+            self.client.get(f'/lists/{list_.id}/items.json')
+        init.assert_not_called()
+
+
+class ExportListTest(TestCase):
+
+    def test_streams_items_as_csv(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text='with, comma')
+        response = self.client.get(f'/lists/{list_.id}/export.csv')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            f'id,text\r\n{item.id},"with, comma"\r\n'
+        )
+
+    def test_streams_items_as_ndjson(self):
+        list_ = List.objects.create()
+        item1 = Item.objects.create(list=list_, text='one')
+        item2 = Item.objects.create(list=list_, text='two')
+        response = self.client.get(f'/lists/{list_.id}/export.ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, [
+            f'{{"id": {item1.id}, "text": "one"}}',
+            f'{{"id": {item2.id}, "text": "two"}}',
+        ])
+
+    def test_is_served_as_an_attachment(self):
+        list_ = List.objects.create()
+        response = self.client.get(f'/lists/{list_.id}/export.csv')
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename="list-{list_.id}.csv"'
+        )
+
 
 class NewListTest(TestCase):
 
@@ -4,5 +4,14 @@ from lists import views
 
 urlpatterns = [
     url(r'^new$', views.new_list, name='new'),
+    url(r'^search$', views.search_lists, name='search'),
+    url(r'^csrf$', views.csrf_token, name='csrf'),
     url(r'^(?P<list_id>\d+)/$', views.view_list, name='view'),
+    url(r'^(?P<list_id>\d+)/items$', views.add_item, name='add_item'),
+    url(r'^(?P<list_id>\d+)/items\.json$', views.list_items, name='items'),
+    url(r'^(?P<list_id>\d+)/items/bulk$', views.bulk_add_items, name='bulk_add'),
+    url(r'^(?P<list_id>\d+)/items/move$', views.move_item, name='move_item'),
+    url(r'^(?P<list_id>\d+)/events$', views.list_events, name='events'),
+    url(r'^(?P<list_id>\d+)/export\.(?P<fmt>csv|ndjson)$', views.export_list,
+        name='export'),
 ]
@@ -1,22 +1,174 @@
+import csv
+import json
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.views import csrf
+from django.views.decorators.cache import cache_control, cache_page, never_cache
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import condition, require_POST
+
+from lists import cache, search
+from lists.forms import ItemForm, ExistingListItemForm, save_items_in_bulk
+from lists.models import Item, List, _following
+from lists.ratelimit import limit_writes
+
+HOME_PAGE_CACHE_SECONDS = 60
+ITEMS_PER_PAGE = 100
+SEARCH_RESULTS_PER_PAGE = 20
+# Texts per bulk add. Form posts are also capped by Django's
+# DATA_UPLOAD_MAX_NUMBER_FIELDS (1000 fields, CSRF token included), so
+# bigger imports send JSON or plain text; see bulk_add_items.
+BULK_ADD_MAX_ITEMS = 5000
+SYNC_PAGE_SIZE = 1000
+SYNC_FIELDS = ('id', 'text', 'position')
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _get_list(list_id):
+    list_ = List.objects.get(id=list_id)
+    if list_.archived:
+        list_.unarchive()
+    return list_
+
+def _page_of_items(list_, after, start):
+    """The page of items following the item `after`, as one range scan
+    on the (list, position, id) index. `start` is how many items come
+    before the page; the cursor carries it so numbering the rows doesn't
+    mean counting them."""
+    items = list_.item_set.all()
+    cursor = after and items.filter(id=after).values_list('position', 'id').first()
+    if cursor:
+        items = items.filter(_following(*cursor))
+    else:
+        start = 0
+    page = list(items[:ITEMS_PER_PAGE + 1])
+    has_next = len(page) > ITEMS_PER_PAGE
+    page = page[:ITEMS_PER_PAGE]
+    return {
+        'items': page,
+        'offset': start,
+        'after': after,
+        'next_after': page[-1].id if has_next else None,
+        'next_start': start + len(page),
+    }
+
+def _number(request, name):
+    value = request.GET.get(name, '')
+    return int(value) if value.isdigit() else None
+
+def _cursor(request):
+    return _number(request, 'after'), _number(request, 'start') or 0
+
+def _item_table(list_, after, start):
+    key = (f'lists:table:{list_.id}:{list_.version}:{after or 0}:{start}:'
+           f'{ITEMS_PER_PAGE}')
+    return cache.get_or_render(key, lambda: _render_item_table(list_, after, start))
+
+def _render_item_table(list_, after, start):
+    context = dict(_page_of_items(list_, after, start), list=list_,
+                   live_updates=settings.LIVE_UPDATES)
+    if context['live_updates'] and not context['next_after']:
+        # After a reorder the last row isn't always the newest item, and
+        # the event stream has to start from the newest.
+        context['last_item_id'] = (
+            list_.item_set.order_by('-id').values_list('id', flat=True).first())
+    return render_to_string('item_table.html', context)
+
+def _list_validators(request, list_id):
+    # one primary-key lookup, shared by the ETag and Last-Modified callbacks
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if not hasattr(request, '_list_validators'):
+        request._list_validators = (
+            List.objects.filter(id=list_id)
+            .values_list('version', 'updated_at')
+            .first()
+        )
+    return request._list_validators
+
+def _list_etag(request, list_id):
+    validators = _list_validators(request, list_id)
+    if validators:
+        after, start = _cursor(request)
+        return f'"{list_id}.{validators[0]}.{after or 0}.{start}.{ITEMS_PER_PAGE}"'
 
-from lists.forms import ItemForm, ExistingListItemForm
-from lists.models import Item, List
+def _list_last_modified(request, list_id):
+    validators = _list_validators(request, list_id)
+    if validators:
+        return validators[1]
 
+# The unbound home page has no CSRF token in it (see home.html), so every
+# visitor gets the same bytes and they can be cached.
+@cache_page(HOME_PAGE_CACHE_SECONDS)
 def home_page(request):
     return render(request, 'home.html', {'form': ItemForm()})
 
+@never_cache
+@ensure_csrf_cookie
+def csrf_token(request):
+    return JsonResponse({'token': get_token(request)})
+
+def csrf_failure(request, reason=''):
+    # Without JavaScript the cached home page posts an empty token. Show the
+    # form again, this time with a token, rather than a bare 403.
+    if request.path == reverse('lists:new'):
+        return render(
+            request, 'home.html', {'form': ItemForm(data=request.POST)},
+            status=403,
+        )
+    return csrf.csrf_failure(request, reason)
+
+@limit_writes
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_list_etag, last_modified_func=_list_last_modified)
 def view_list(request, list_id):
-    list_ = List.objects.get(id=list_id)
+    list_ = _get_list(list_id)
     form = ExistingListItemForm(for_list=list_)
     if request.method == 'POST':
         form = ExistingListItemForm(for_list=list_, data=request.POST)
-        if form.is_valid():
-            form.save()
+        if form.is_valid() and form.save():
             return redirect(list_)
-    return render(request, 'list.html', {'list': list_, 'form': form})
+    after, start = _cursor(request)
+    table, hit = _item_table(list_, after, start)
+    response = render(request, 'list.html', {
+        'list': list_, 'form': form, 'after': after, 'start': start,
+        'table': table,
+    })
+    response['X-Fragment-Cache'] = 'hit' if hit else 'miss'
+    return response
+
+def search_lists(request):
+    query = request.GET.get('q', '')
+    page = request.GET.get('page', '')
+    page = int(page) if page.isdigit() and int(page) > 0 else 1
+    results = search.search_items(
+        query,
+        limit=SEARCH_RESULTS_PER_PAGE + 1,
+        offset=(page - 1) * SEARCH_RESULTS_PER_PAGE,
+    )
+    return render(request, 'search.html', {
+        'form': ItemForm(),
+        'query': query,
+        'results': results[:SEARCH_RESULTS_PER_PAGE],
+        'page': page,
+        'has_next': len(results) > SEARCH_RESULTS_PER_PAGE,
+    })
 
+@limit_writes
 def new_list(request):
     form = ItemForm(data=request.POST)
     if form.is_valid():
@@ -25,3 +177,144 @@ def new_list(request):
         return redirect(list_)
     else:
         return render(request, 'home.html', {'form': form})
+
+@require_POST
+@limit_writes
+def add_item(request, list_id):
+    list_ = _get_list(list_id)
+    form = ExistingListItemForm(for_list=list_, data=request.POST)
+    item = form.save() if form.is_valid() else None
+    if item is None:
+        return JsonResponse({'errors': form.errors['text']}, status=400)
+    list_.refresh_from_db(fields=['item_count'])
+    row = render_to_string(
+        'item_row.html', {'item': item, 'number': list_.item_count})
+    return JsonResponse({'row': row}, status=201)
+
+def _list_item(list_, item_id):
+    return list_.item_set.get(id=item_id) if item_id else None
+
+@require_POST
+@limit_writes
+def move_item(request, list_id):
+    list_ = _get_list(list_id)
+    try:
+        item = list_.item_set.get(id=request.POST.get('item'))
+        after = _list_item(list_, request.POST.get('after'))
+        before = _list_item(list_, request.POST.get('before'))
+    except (ValueError, Item.DoesNotExist):
+        return JsonResponse({'errors': ['No such item in this list']}, status=400)
+    if item in (after, before):
+        return JsonResponse({'errors': ["An item can't move next to itself"]}, status=400)
+    item.move(after=after, before=before)
+    return JsonResponse({'position': item.position})
+
+def _bulk_texts(request):
+    content_type = request.content_type
+    if content_type == 'application/json':
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+        except ValueError:
+            raise ValueError('The request body is not valid JSON')
+        texts = data.get('text') if isinstance(data, dict) else data
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            raise ValueError('Send {"text": [...]} with a list of strings')
+        return texts
+    if content_type == 'text/plain':
+        return request.body.decode(request.encoding or 'utf-8').splitlines()
+    return request.POST.getlist('text')
+
+@require_POST
+@limit_writes
+def bulk_add_items(request, list_id):
+    """Add up to BULK_ADD_MAX_ITEMS texts at once, sent as repeated `text`
+    form fields, a JSON body {"text": [...]}, or a text/plain body with
+    one text per line. JSON and plain-text posts carry their CSRF token in
+    the X-CSRFToken header."""
+    list_ = _get_list(list_id)
+    try:
+        texts = _bulk_texts(request)
+    except ValueError as error:
+        return JsonResponse({'errors': [str(error)]}, status=400)
+    if len(texts) > BULK_ADD_MAX_ITEMS:
+        return JsonResponse(
+            {'errors': [f'At most {BULK_ADD_MAX_ITEMS} items at a time']},
+            status=400,
+        )
+    created, rejected = save_items_in_bulk(list_, texts)
+    return JsonResponse({
+        'created': [item.text for item in created],
+        'rejected': rejected,
+    })
+
+def _sync_fields(request):
+    requested = request.GET.get('fields')
+    if not requested:
+        return SYNC_FIELDS
+    fields = [name for name in requested.split(',') if name and name != 'id']
+    if not set(fields) <= set(SYNC_FIELDS):
+        return None
+    return ('id', *dict.fromkeys(fields))
+
+def list_items(request, list_id):
+    """The items added to a list since ?since=<item id>, oldest first, as
+    JSON.
+
+    Item ids only ever grow, so a client keeps the last id it saw and asks
+    for what came after it; `more` says another page is waiting. Moves and
+    deletions don't show up as new items, but they do bump `version`, and a
+    client that sees it change with nothing new can sync again from 0.
+    ?fields= picks columns (id is always sent) and ?compact=1 sends each
+    item as an array in `fields` order instead of an object.
+    """
+    since = request.GET.get('since', '')
+    since = int(since) if since.isdigit() else 0
+    fields = _sync_fields(request)
+    if fields is None:
+        return JsonResponse(
+            {'errors': [f'fields must be among {", ".join(SYNC_FIELDS)}']},
+            status=400,
+        )
+    list_ = _get_list(list_id)
+    rows = list(
+        list_.item_set.filter(id__gt=since).order_by('id')
+        .values_list(*fields)[:SYNC_PAGE_SIZE + 1]
+    )
+    more = len(rows) > SYNC_PAGE_SIZE
+    rows = rows[:SYNC_PAGE_SIZE]
+    compact = request.GET.get('compact') == '1'
+    return JsonResponse({
+        'list': list_.id,
+        'version': list_.version,
+        'item_count': list_.item_count,
+        'since': rows[-1][0] if rows else since,
+        'more': more,
+        'fields': fields,
+        'items': rows if compact else [dict(zip(fields, row)) for row in rows],
+    }, json_dumps_params={'separators': (',', ':')} if compact else None)
+
+def list_events(request, list_id):
+    # Streamed by superlists/asgi.py; reaching Django means nginx isn't
+    # routing events there, and a 204 stops EventSource reconnecting.
+    return HttpResponse(status=204)
+
+def _csv_rows(list_):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(['id', 'text'])
+    for row in list_.iter_items('text'):
+        yield writer.writerow(row)
+
+def _ndjson_rows(list_):
+    for id_, text in list_.iter_items('text'):
+        yield json.dumps({'id': id_, 'text': text}) + '\n'
+
+def export_list(request, list_id, fmt):
+    list_ = _get_list(list_id)
+    rows = _csv_rows(list_) if fmt == 'csv' else _ndjson_rows(list_)
+    response = StreamingHttpResponse(
+        rows, content_type=EXPORT_CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = (
+        f'attachment; filename="list-{list_.id}.{fmt}"')
+    # let nginx pass chunks through instead of buffering the whole export
+    response['X-Accel-Buffering'] = 'no'
+    return response
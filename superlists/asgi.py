@@ -0,0 +1,45 @@
+"""
+ASGI config for superlists project, for the one view that holds its
+connection open: /lists/<id>/events (see lists.events).
+
+Django 1.11 only speaks WSGI, so this is a small ASGI app of its own, run
+under uvicorn next to gunicorn; nginx sends /lists/<id>/events here and
+everything else to gunicorn. Many open event streams then cost one event
+loop instead of one sync worker each.
+
+    uvicorn superlists.asgi:application --uds /tmp/SITENAME-events.socket
+"""
+
+import os
+
+import django
+from django.urls import Resolver404, resolve
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "superlists.settings")
+django.setup()
+
+from lists import events  # noqa: E402 (needs the app registry)
+
+hub = events.ListEvents()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    try:
+        match = resolve(scope['path'])
+    except Resolver404:
+        match = None
+    if (scope['type'] != 'http' or scope['method'] != 'GET'
+            or not match or match.view_name != 'lists:events'):
+        await send({'type': 'http.response.start', 'status': 404, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    await events.stream(hub, int(match.kwargs['list_id']), scope, receive, send)
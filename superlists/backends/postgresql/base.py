@@ -0,0 +1,28 @@
+"""
+PostgreSQL backend that checks a persistent connection still works before
+its first use in each request, when CONN_HEALTH_CHECKS is set on its
+DATABASES entry. Without it a connection the server dropped between requests
+is only noticed when the next query fails.
+"""
+from django.db.backends.postgresql import base
+
+from superlists.timing import TimedCursors
+
+
+class DatabaseWrapper(TimedCursors, base.DatabaseWrapper):
+    health_check_done = False
+
+    def close_if_unusable_or_obsolete(self):
+        # runs at the start and end of every request
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (self.connection is not None
+                and not self.health_check_done
+                and not self.in_atomic_block
+                and self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
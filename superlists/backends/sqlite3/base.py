@@ -0,0 +1,17 @@
+"""
+SQLite backend that applies the PRAGMAS of its DATABASES entry to every new
+connection, since most SQLite pragmas only last for the connection that set
+them.
+"""
+from django.db.backends.sqlite3 import base
+
+from superlists.backends.sqlite3.pragmas import apply_pragmas
+from superlists.timing import TimedCursors
+
+
+class DatabaseWrapper(TimedCursors, base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        apply_pragmas(conn, self.settings_dict.get('PRAGMAS', {}))
+        return conn
@@ -0,0 +1,11 @@
+def apply_pragmas(conn, pragmas):
+    """Run ``PRAGMA name = value`` for each entry, in order, on a DB-API
+    sqlite3 connection."""
+    cursor = conn.cursor()
+    try:
+        for name, value in pragmas.items():
+            if not name.isidentifier():
+                raise ValueError(f'Invalid SQLite pragma name: {name!r}')
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
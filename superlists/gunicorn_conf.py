@@ -0,0 +1,72 @@
+"""Gunicorn settings, read from GUNICORN_* environment variables.
+
+Used by deploy_tools/gunicorn-systemd.template.service as
+``gunicorn --config superlists/gunicorn_conf.py``; the fabfile writes the
+variables to the site's gunicorn.env. Anything not set falls back to a
+default sized from the host's CPU count.
+"""
+import multiprocessing
+import os
+
+
+def _env(name, default):
+    return os.environ.get(f'GUNICORN_{name}', default)
+
+
+def _env_int(name, default):
+    return int(_env(name, default))
+
+
+def _env_bool(name, default):
+    return _env(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+CPUS = multiprocessing.cpu_count()
+
+# "sync" workers handle one request at a time, so they want the classic
+# 2 * cores + 1. "gthread" workers overlap requests that are waiting on the
+# database, so fewer processes with a few threads each go further per MB.
+worker_class = _env('WORKER_CLASS', 'sync')
+if worker_class == 'gthread':
+    workers = _env_int('WORKERS', CPUS + 1)
+    threads = _env_int('THREADS', 4)
+else:
+    workers = _env_int('WORKERS', 2 * CPUS + 1)
+    threads = _env_int('THREADS', 1)
+
+# Load Django once in the master and fork workers from it: faster restarts
+# and copy-on-write sharing of the imported code.
+preload_app = _env_bool('PRELOAD', False)
+
+# Recycle workers every so often to cap slow leaks, staggered by the jitter
+# so they don't all restart at once.
+max_requests = _env_int('MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('MAX_REQUESTS_JITTER', 100)
+
+# nginx talks to us over a unix socket on the same box, so connections are
+# cheap and short-lived: a deep accept queue to absorb bursts, a short
+# keepalive, and a timeout that kills stuck workers well before nginx's
+# 60s proxy_read_timeout gives up on them.
+bind = _env('BIND', 'unix:/tmp/superlists.socket')
+backlog = _env_int('BACKLOG', 2048)
+timeout = _env_int('TIMEOUT', 30)
+graceful_timeout = _env_int('GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('KEEPALIVE', 2)
+
+# Compile templates, resolve URLs and connect to the database in each worker
+# before it starts accepting requests (see superlists/warmup.py).
+WARMUP = _env_bool('WARMUP', True)
+
+
+def post_fork(server, worker):
+    # Anything the master opened while preloading must not be shared with
+    # the workers.
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    if WARMUP:
+        from superlists.warmup import warmup
+        warmup()
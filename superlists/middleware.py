@@ -0,0 +1,87 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+
+from superlists import timing
+from superlists.routers import set_read_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+PIN_COOKIE = 'db_primary'
+
+timing_logger = logging.getLogger('superlists.timing')
+
+
+class ReadReplicaMiddleware:
+    """Serve safe requests from the read replica, except for clients that
+    wrote something in the last READ_REPLICA_PIN_SECONDS. Those are pinned
+    to the primary with a short-lived cookie so they always read their own
+    writes, e.g. the new item on the page they are redirected to."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in SAFE_METHODS
+        set_read_replica(safe and PIN_COOKIE not in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            set_read_replica(False)
+        if not safe:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.READ_REPLICA_PIN_SECONDS,
+                httponly=True,
+            )
+        return response
+
+
+class ServerTimingMiddleware:
+    """Break each request down into URL resolving, view, database and
+    template time, and report it as a Server-Timing header plus one JSON log
+    line on the superlists.timing logger.
+
+    The phases are measured by the hooks in superlists.timing, which only
+    act on the thread of a request this middleware is timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.urlconf = 'superlists.timing_urls'
+        start = time.perf_counter()
+        with timing.timing(timing.Timings()) as timings:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        if hasattr(request, '_timing_view_start'):
+            timings.add('view', time.perf_counter() - request._timing_view_start)
+        timings.add('total', total)
+
+        response['Server-Timing'] = ', '.join(
+            self.metric(timings, phase)
+            for phase in ('resolve', 'view', 'db', 'render', 'total')
+        )
+        timing_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'ms': {
+                phase: round(seconds * 1000, 3)
+                for phase, seconds in timings.seconds.items()
+            },
+            'queries': timings.counts['db'],
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_view_start = time.perf_counter()
+
+    @staticmethod
+    def metric(timings, phase):
+        metric = f'{phase};dur={timings.seconds[phase] * 1000:.3f}'
+        if phase == 'db':
+            metric += f';desc="{timings.counts["db"]} queries"'
+        return metric
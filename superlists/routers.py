@@ -0,0 +1,40 @@
+import threading
+
+from django.db import connections
+
+REPLICA = 'replica'
+
+_state = threading.local()
+
+
+def set_read_replica(enabled):
+    _state.use_replica = enabled
+
+
+class ReplicaRouter:
+    """Send reads to the "replica" database while the current request has
+    asked for it (see superlists.middleware.ReadReplicaMiddleware), and
+    everything else to "default"."""
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'use_replica', False) and REPLICA in connections.databases:
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        # never write back through an object that was read from the replica
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == REPLICA:
+            return 'default'
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as default
+        if {obj1._state.db, obj2._state.db} <= {'default', REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == REPLICA:
+            return False
+        return None
@@ -38,10 +38,17 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'lists',
+    'accounts',
 ]
 
+AUTH_USER_MODEL = 'accounts.User'
+
+# Seconds a login token stays usable; `manage.py purgetokens` deletes older ones.
+LOGIN_TOKEN_TTL = 60 * 60
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'superlists.middleware.ReadReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -50,6 +57,15 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# DJANGO_SERVER_TIMING=1 adds a Server-Timing header and a timing log line
+# to every response. Off by default; when off nothing is instrumented.
+SERVER_TIMING = os.environ.get('DJANGO_SERVER_TIMING') == '1'
+if SERVER_TIMING:
+    MIDDLEWARE.insert(0, 'superlists.middleware.ServerTimingMiddleware')
+
+# The home page is cached without a CSRF token; see lists.views.csrf_failure.
+CSRF_FAILURE_VIEW = 'lists.views.csrf_failure'
+
 ROOT_URLCONF = 'superlists.urls'
 
 TEMPLATES = [
@@ -69,18 +85,172 @@ TEMPLATES = [
     },
 ]
 
+if SERVER_TIMING:
+    TEMPLATES[0]['BACKEND'] = 'superlists.timing.TimedDjangoTemplates'
+
 WSGI_APPLICATION = 'superlists.wsgi.application'
 
+TEST_RUNNER = 'superlists.test_runner.TestRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/1.11/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, '../database/db.sqlite3'),
+# Applied to every new SQLite connection, in this order. WAL lets readers
+# carry on while a gunicorn worker writes, and busy_timeout makes writers
+# queue for the lock instead of failing with "database is locked". Set to {}
+# to run with SQLite's defaults.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative means KiB, so 64MB
+}
+
+# DJANGO_DB_ENGINE picks the backend: "sqlite" (default) or "postgresql".
+# Connections are kept open for DJANGO_DB_CONN_MAX_AGE seconds instead of
+# being opened per request, and persistent PostgreSQL connections are pinged
+# before their first use in each request.
+DATABASE_ENGINE = os.environ.get('DJANGO_DB_ENGINE', 'sqlite')
+CONN_MAX_AGE = int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 60))
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'superlists.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'superlists'),
+            'USER': os.environ.get('DJANGO_DB_USER', ''),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', ''),
+            'PORT': os.environ.get('DJANGO_DB_PORT', ''),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
+elif DATABASE_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'superlists.backends.sqlite3',
+            'NAME': os.environ.get(
+                'DJANGO_DB_NAME',
+                os.path.join(BASE_DIR, '../database/db.sqlite3')
+            ),
+            'PRAGMAS': SQLITE_PRAGMAS,
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+        }
+    }
+else:
+    raise ValueError(f'Unknown DJANGO_DB_ENGINE: {DATABASE_ENGINE!r}')
+
+# Set DJANGO_DB_REPLICA_NAME (and DJANGO_DB_REPLICA_HOST for PostgreSQL) to
+# serve GET and HEAD requests from a read replica. After a write the client
+# reads from the primary for READ_REPLICA_PIN_SECONDS, so its own changes
+# never seem to vanish while the replica catches up.
+if os.environ.get('DJANGO_DB_REPLICA_NAME'):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        NAME=os.environ['DJANGO_DB_REPLICA_NAME'],
+        HOST=os.environ.get(
+            'DJANGO_DB_REPLICA_HOST', DATABASES['default'].get('HOST', '')),
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['superlists.routers.ReplicaRouter']
+READ_REPLICA_PIN_SECONDS = int(os.environ.get('DJANGO_DB_REPLICA_PIN_SECONDS', 10))
+
+# Point DJANGO_DB_COPY_FROM at an old SQLite file to make it available as the
+# "legacy" database for `manage.py copydata`.
+if os.environ.get('DJANGO_DB_COPY_FROM'):
+    DATABASES['legacy'] = {
+        'ENGINE': 'superlists.backends.sqlite3',
+        'NAME': os.environ['DJANGO_DB_COPY_FROM'],
+        'PRAGMAS': SQLITE_PRAGMAS,
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/1.11/topics/cache/
+# List fragments are keyed on List.version, which lives in the database, so
+# a per-process cache never serves a stale table; a shared backend such as
+# memcached just raises the hit rate. The hit/miss counters always go to
+# the shared alias below (FRAGMENT_STATS_CACHE).
+
+# Set DJANGO_CACHE_BACKEND and DJANGO_CACHE_LOCATION to share one cache
+# between gunicorn workers, e.g.
+# django.core.cache.backends.memcached.MemcachedCache and 127.0.0.1:11211.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+    },
+    # State every gunicorn worker, and manage.py, must see: rate limit
+    # buckets and the fragment cache counters. Never per-process, and kept
+    # out of the database whose writes the limiter is there to shed.
+    'shared': {
+        'BACKEND': os.environ.get(
+            'DJANGO_SHARED_CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache'
+        ),
+        'LOCATION': os.environ.get(
+            'DJANGO_SHARED_CACHE_LOCATION', '127.0.0.1:11211'),
+    },
 }
+FRAGMENT_STATS_CACHE = 'shared'
+
+
+# Sessions
+# https://docs.djangoproject.com/en/1.11/topics/http/sessions/
+# DJANGO_SESSION_ENGINE picks where sessions live: "db" (default), "cache" or
+# "cached_db". Both cache modes need the shared cache above; with the
+# per-process default a worker could read a session another worker changed.
+# Sessions are only loaded when something reads them and only saved when
+# modified, so anonymous GETs of home_page and view_list never create one.
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('DJANGO_SESSION_ENGINE', 'db')]
+
+
+# Rate limiting
+# Write views (see lists.ratelimit.limit_writes) allow each client IP and
+# each list a token bucket of (requests per second, burst), and at most
+# WRITE_CONCURRENCY_LIMIT writes in progress at once; SQLite has a single
+# writer, so more than a few only queue up on its lock. Buckets live in the
+# RATE_LIMIT_CACHE alias above and write slots are lock files in
+# WRITE_SLOTS_DIR, both shared by all workers on the host. The test runner
+# turns limiting off (see superlists.test_runner).
+
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_CACHE = 'shared'
+RATE_LIMITS = {
+    'ip': (1, 20),
+    'list': (5, 50),
+}
+WRITE_CONCURRENCY_LIMIT = int(os.environ.get('DJANGO_WRITE_CONCURRENCY_LIMIT', 8))
+WRITE_SLOTS_DIR = os.environ.get(
+    'DJANGO_WRITE_SLOTS_DIR', os.path.join(BASE_DIR, '../database/write-slots'))
+# nginx passes the real client address here; REMOTE_ADDR is empty over the
+# unix socket.
+CLIENT_IP_HEADER = 'HTTP_X_REAL_IP'
+
+
+# Lists
+# Treat items that differ only in case or whitespace as duplicates. Changing
+# this only affects items saved afterwards; existing hashes are not rewritten.
+
+LISTS_LOOSE_DUPLICATES = False
+
+# Set DJANGO_LIVE_UPDATES=1 once nginx sends /lists/<id>/events to the
+# uvicorn service running superlists/asgi.py; list pages then pick up new
+# items as they are added instead of needing a reload.
+LIVE_UPDATES = os.environ.get('DJANGO_LIVE_UPDATES') == '1'
 
 
 # Password validation
@@ -120,4 +290,31 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/1.11/howto/static-files/
 
 STATIC_URL = '/static/'
-STATIC_ROOT = os.path.abspath(os.path.join(BASE_DIR, '../static'))
\ No newline at end of file
+STATIC_ROOT = os.path.abspath(os.path.join(BASE_DIR, '../static'))
+STATICFILES_STORAGE = 'superlists.storage.CompressedManifestStaticFilesStorage'
+
+
+# Logging
+# https://docs.djangoproject.com/en/1.11/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'superlists.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'superlists.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,58 @@
+import gzip
+import io
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.html', '.map')
+MIN_COMPRESS_SIZE = 256
+
+
+def _gzip(content):
+    # A fixed mtime keeps the .gz byte-identical across deploys.
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(content)
+    return buffer.getvalue()
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Content-hashed filenames, plus .gz (and .br, when the brotli package
+    is installed) siblings for nginx's gzip_static/brotli_static to serve.
+
+    Names missing from the manifest are served unhashed rather than raising,
+    so the site still renders before collectstatic has been run (e.g. under
+    the test runner)."""
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self._write_compressed(name)
+
+    def _write_compressed(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        self._save_sibling(name + '.gz', _gzip(content))
+        if brotli is not None:
+            self._save_sibling(name + '.br', brotli.compress(content))
+
+    def _save_sibling(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
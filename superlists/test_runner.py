@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Runs tests with rate limiting off, as every test client request
+    comes from one address, and with the shared cache in local memory
+    rather than memcached. Tests of the limiter turn it back on themselves."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._settings = override_settings(
+            RATE_LIMIT_ENABLED=False,
+            CACHES=dict(settings.CACHES, shared={
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'shared',
+            }),
+        )
+        self._settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,110 @@
+"""
+Hooks for ServerTimingMiddleware. Each one times its phase only on a thread
+whose request is being timed, and nothing here is patched onto Django's
+classes:
+
+* SQL through the project's database backends (make_cursor)
+* URL resolving through the URLconf in superlists/timing_urls.py, which the
+  middleware sets as request.urlconf
+* templates through TimedDjangoTemplates, the TEMPLATES backend while
+  DJANGO_SERVER_TIMING is on
+"""
+import collections
+import contextlib
+import threading
+import time
+
+from django.db.backends.utils import CursorWrapper
+from django.template.backends.django import DjangoTemplates, Template
+from django.urls import RegexURLResolver
+
+_timing = threading.local()
+
+
+class Timings:
+
+    def __init__(self):
+        self.running = set()
+        self.seconds = collections.defaultdict(float)
+        self.counts = collections.defaultdict(int)
+
+    def add(self, phase, seconds):
+        self.seconds[phase] += seconds
+        self.counts[phase] += 1
+
+
+def current():
+    return getattr(_timing, 'current', None)
+
+
+@contextlib.contextmanager
+def timing(timings):
+    _timing.current = timings
+    try:
+        yield timings
+    finally:
+        _timing.current = None
+
+
+@contextlib.contextmanager
+def phase(name):
+    timings = current()
+    # nested calls (included templates, a wrapped cursor calling another)
+    # are already inside the outer measurement
+    if timings is None or name in timings.running:
+        yield
+        return
+    timings.running.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.running.discard(name)
+        timings.add(name, time.perf_counter() - start)
+
+
+class TimedCursorWrapper(CursorWrapper):
+
+    def execute(self, sql, params=None):
+        with phase('db'):
+            return super().execute(sql, params)
+
+    def executemany(self, sql, param_list):
+        with phase('db'):
+            return super().executemany(sql, param_list)
+
+
+class TimedCursors:
+    """DatabaseWrapper mixin: cursors made while a request is being timed
+    count their queries."""
+
+    def make_cursor(self, cursor):
+        cursor = super().make_cursor(cursor)
+        return TimedCursorWrapper(cursor, self) if current() else cursor
+
+    def make_debug_cursor(self, cursor):
+        cursor = super().make_debug_cursor(cursor)
+        return TimedCursorWrapper(cursor, self) if current() else cursor
+
+
+class TimedURLResolver(RegexURLResolver):
+
+    def resolve(self, path):
+        with phase('resolve'):
+            return super().resolve(path)
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        with phase('render'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,8 @@
+"""The ROOT_URLCONF, resolved inside a timed phase; see superlists.timing."""
+from django.conf import settings
+
+from superlists.timing import TimedURLResolver
+
+urlpatterns = [
+    TimedURLResolver(r'^', settings.ROOT_URLCONF),
+]
@@ -0,0 +1,68 @@
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.db import connections
+from django.template.loader import get_template, render_to_string
+from django.urls import resolve, reverse
+
+from lists.forms import ExistingListItemForm, ItemForm
+from lists.models import List
+from superlists.routers import REPLICA
+
+logger = logging.getLogger('superlists.warmup')
+
+TEMPLATES = (
+    'base.html', 'home.html', 'list.html', 'item_table.html', 'item_row.html',
+    'search.html',
+)
+PATHS = (
+    '/', '/lists/new', '/lists/search', '/lists/1/', '/lists/1/items',
+    '/lists/1/items/bulk', '/lists/1/export.csv',
+)
+DATABASES = ('default', REPLICA)
+
+
+@contextmanager
+def _step(timings, name):
+    start = time.perf_counter()
+    yield
+    timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def warmup(connect=True):
+    """Do the one-off work the first requests to / and /lists/<id>/ would
+    otherwise pay for, and log how long each part took.
+
+    Meant to run in each worker before it accepts traffic (see
+    superlists/gunicorn_conf.py). Templates only stay compiled if the cached
+    template loader is on, which it is whenever DEBUG is off.
+    """
+    timings = OrderedDict()
+    with _step(timings, 'templates'):
+        for name in TEMPLATES:
+            get_template(name)
+    with _step(timings, 'forms'):
+        # Rendering the fields also compiles Django's widget templates.
+        # There's no request to take a CSRF token from, and Django's
+        # placeholder for that case keeps the tag from warning.
+        render_to_string(
+            'home.html', {'form': ItemForm(), 'csrf_token': 'NOTPROVIDED'})
+        str(ExistingListItemForm(for_list=List())['text'])
+    with _step(timings, 'urls'):
+        for path in PATHS:
+            resolve(path)
+        reverse('lists:view', args=[1])
+    if connect:
+        with _step(timings, 'db'):
+            for alias in DATABASES:
+                if alias in connections.databases:
+                    connections[alias].ensure_connection()
+    timings['total'] = round(sum(timings.values()), 1)
+    logger.info(
+        'warmup took %sms (%s)', timings['total'],
+        ', '.join(f'{name} {ms}ms' for name, ms in timings.items()
+                  if name != 'total'),
+    )
+    return timings
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "superlists.settings")
 
 application = get_wsgi_application()
+
+# For servers without a post-fork hook of their own; gunicorn warms up each
+# worker from superlists/gunicorn_conf.py instead.
+if os.environ.get('DJANGO_WARMUP'):
+    from superlists.warmup import warmup
+    warmup()